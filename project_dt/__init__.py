@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
-#from . import controllers
+from . import cli
+from . import controllers
 from . import models
 #from . import report
@@ -3,7 +3,7 @@
 
 {
     'name': 'Mini Project',
-    'version': '1.1',
+    'version': '1.2',
     'website': '',
     'category': 'Project',
     'sequence': 1,
@@ -12,6 +12,7 @@
     'depends': [
         'base',
         'base_setup',
+        'bus',
         'project',
         'crm_project',
         'mail',
@@ -27,7 +28,13 @@
     'description': "If you need same module of Project Management as same when installed module of Project Management base, you can use this module",
     'data': [
         'security/ir.model.access.csv',
+        'security/project_security.xml',
+        'data/project_dt_data.xml',
+        'views/project_dt_assets.xml',
         'views/project_views.xml',
+        'views/project_dt_report_views.xml',
+        'views/project_dt_archive_views.xml',
+        'views/portal_templates.xml',
     ],
     #'qweb': ['static/src/xml/project.xml'],
     #'demo': ['data/project_demo.xml'],
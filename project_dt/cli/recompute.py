@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from functools import partial
+
+import odoo
+from odoo import api, SUPERUSER_ID
+from odoo.cli import Command
+from odoo.tools import config
+
+from ..models.project_dt_recompute import RECOMPUTE_CHUNK_SIZE
+
+_logger = logging.getLogger(__name__)
+
+
+def _init_worker():
+    # connections opened before the fork belong to the parent process
+    odoo.sql_db.close_all()
+
+
+def _recompute_chunk(dbname, ids):
+    """ Recompute one chunk in its own cursor and transaction. """
+    try:
+        registry = odoo.registry(dbname)
+        with api.Environment.manage(), registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            env['project.dt'].browse(ids).exists()._recompute_rollups_dt()
+    except Exception:
+        _logger.exception("Recompute of projects DT %d-%d failed", ids[0], ids[-1])
+        return ids[0], ids[-1], len(ids), False
+    return ids[0], ids[-1], len(ids), True
+
+
+class RecomputeDt(Command):
+    """ Recompute the project_dt rollups with a pool of worker processes """
+
+    def run(self, args):
+        parser = argparse.ArgumentParser(
+            prog="%s recomputedt" % sys.argv[0].split(os.path.sep)[-1],
+            description=self.__doc__.strip())
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Number of worker processes (default: number of cores)")
+        parser.add_argument('--chunk-size', type=int, default=RECOMPUTE_CHUNK_SIZE,
+                            help="Projects per chunk; each chunk is committed on its own")
+        parser.add_argument('--start-id', type=int, default=0,
+                            help="Skip the projects below this id, to resume an interrupted run")
+        opts, server_args = parser.parse_known_args(args)
+        config.parse_config(server_args)
+        dbname = config['db_name']
+        if not dbname or ',' in dbname:
+            sys.exit("recomputedt needs exactly one database (-d)")
+        odoo.cli.server.report_configuration()
+
+        # load the registry before forking, so the workers inherit it
+        registry = odoo.registry(dbname)
+        with api.Environment.manage(), registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            chunks = env['project.dt']._recompute_chunks_dt(opts.chunk_size, opts.start_id)
+        odoo.sql_db.close_all()
+        total = sum(len(ids) for ids in chunks)
+        _logger.info("Recomputing %d projects DT in %d chunks with %d workers", total, len(chunks), opts.workers)
+
+        start, done, failed = time.time(), 0, []
+        pool = multiprocessing.Pool(max(opts.workers, 1), initializer=_init_worker)
+        try:
+            for index, (first, last, count, ok) in enumerate(
+                    pool.imap_unordered(partial(_recompute_chunk, dbname), chunks), 1):
+                if ok:
+                    done += count
+                else:
+                    failed.append((first, last))
+                _logger.info("Chunk %d/%d (ids %d-%d) %s, %d/%d projects, %.1fs",
+                             index, len(chunks), first, last, ok and "committed" or "FAILED",
+                             done, total, time.time() - start)
+        finally:
+            pool.close()
+            pool.join()
+        if failed:
+            _logger.error("Failed chunks %s; the recompute is idempotent, rerun with --start-id %d",
+                          ", ".join("%d-%d" % chunk for chunk in failed), min(chunk[0] for chunk in failed))
+            sys.exit(1)
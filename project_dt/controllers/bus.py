@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo.http import request
+
+from odoo.addons.bus.controllers.main import BusController
+
+from odoo.addons.project_dt.models.project_dt_bus import kanban_channel_dt
+
+
+class BusControllerDt(BusController):
+
+    def _poll(self, dbname, channels, last, options):
+        """ Project users listen to the kanban change events. Clients cannot
+            subscribe to this channel themselves, it is not a string. """
+        if request.session.uid and request.env.user.has_group('project.group_project_user'):
+            channels = list(channels)
+            channels.append(kanban_channel_dt(request.db))
+        return super(BusControllerDt, self)._poll(dbname, channels, last, options)
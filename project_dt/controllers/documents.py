@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import json
+import logging
+import mimetypes
+import unicodedata
+
+from werkzeug.exceptions import BadRequest, NotFound
+
+from odoo import http, _
+from odoo.exceptions import AccessError, MissingError
+from odoo.http import request
+from odoo.modules.module import get_module_resource
+
+from odoo.addons.web.controllers.main import Binary, serialize_exception
+
+_logger = logging.getLogger(__name__)
+
+THUMBNAIL_CACHE_TIMEOUT = 365 * 24 * 60 * 60
+PLACEHOLDER_CACHE_TIMEOUT = 60 * 60
+# attachments uploaded from the chatter are created on the composer first
+STREAMED_UPLOAD_MODELS = ('mail.compose.message',)
+
+
+def _upload_mimetype(ufile):
+    return ufile.mimetype or mimetypes.guess_type(ufile.filename)[0] or 'application/octet-stream'
+
+
+class ProjectDtDocuments(http.Controller):
+
+    def _document(self, attachment_id):
+        attachment = request.env['ir.attachment'].browse(attachment_id)
+        try:
+            attachment.check('read')
+            # prefetch the metadata only, never the body
+            attachment.read(['name', 'datas_fname', 'mimetype', 'store_fname', 'checksum'])
+        except (AccessError, MissingError):
+            raise NotFound()
+        return attachment
+
+    @http.route('/project_dt/doc/upload', type='http', auth='user', methods=['POST'])
+    def upload(self, ufile, res_model, res_id, doc_type, **kw):
+        """ Streamed upload of a design document; answers its id as JSON. """
+        try:
+            res_id, doc_type = int(res_id), int(doc_type)
+        except ValueError:
+            raise BadRequest()
+        if res_model not in request.env['ir.attachment']._dt_models:
+            raise BadRequest()
+        attachment = request.env['ir.attachment']._dt_create_from_stream(
+            ufile.stream, ufile.filename, _upload_mimetype(ufile), res_model, res_id, doc_type)
+        body = json.dumps({'id': attachment.id, 'checksum': attachment.checksum, 'file_size': attachment.file_size})
+        return request.make_response(body, headers=[('Content-Type', 'application/json')])
+
+    @http.route('/project_dt/doc/<int:attachment_id>/content', type='http', auth='user', methods=['GET'])
+    def content(self, attachment_id, download=False, **kw):
+        """ Stream the body from the filestore; inline for previews. """
+        attachment = self._document(attachment_id)
+        return http.send_file(
+            attachment._dt_open(), filename=attachment.datas_fname or attachment.name,
+            mimetype=attachment.mimetype, as_attachment=bool(download), cache_timeout=0)
+
+    @http.route('/project_dt/doc/<int:attachment_id>/thumbnail', type='http', auth='user', methods=['GET'])
+    def thumbnail(self, attachment_id, **kw):
+        attachment = self._document(attachment_id)
+        path = attachment._dt_thumbnail_path()
+        if not path:
+            # not an image, or one that cannot be rendered
+            return http.send_file(get_module_resource('web', 'static/src/img', 'placeholder.png'),
+                                  mimetype='image/png', cache_timeout=PLACEHOLDER_CACHE_TIMEOUT)
+        # the thumbnail is addressed by content, it never changes
+        return http.send_file(path, mimetype='image/png', cache_timeout=THUMBNAIL_CACHE_TIMEOUT)
+
+
+class BinaryDt(Binary):
+
+    @http.route()
+    @serialize_exception
+    def upload_attachment(self, callback, model, id, ufile):
+        """ Stream the files attached from the sidebar and the chatter of
+            projects and tasks into the filestore, instead of base64 encoding
+            them in memory. """
+        Attachment = request.env['ir.attachment']
+        if model not in Attachment._dt_models + STREAMED_UPLOAD_MODELS:
+            return super(BinaryDt, self).upload_attachment(callback, model, id, ufile)
+        out = """<script language="javascript" type="text/javascript">
+                    var win = window.top.window;
+                    win.jQuery(win).trigger(%s, %s);
+                </script>"""
+        args = []
+        for ufile in request.httprequest.files.getlist('ufile'):
+            filename = ufile.filename
+            if request.httprequest.user_agent.browser == 'safari':
+                # Safari sends NFD UTF-8, answer with the same
+                filename = unicodedata.normalize('NFD', ufile.filename)
+            try:
+                attachment = Attachment._dt_create_from_stream(
+                    ufile.stream, filename, _upload_mimetype(ufile), model, int(id))
+            except Exception:
+                args.append({'error': _("Something horrible happened")})
+                _logger.exception("Fail to upload attachment %s", ufile.filename)
+            else:
+                args.append({'filename': filename, 'mimetype': attachment.mimetype, 'id': attachment.id})
+        return out % (json.dumps(callback), json.dumps(args))
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import json
+
+from werkzeug.exceptions import NotFound
+from werkzeug.wrappers import Response
+
+from odoo import http
+from odoo.exceptions import AccessError
+from odoo.http import request
+
+
+class ProjectDtJson(http.Controller):
+
+    @http.route('/project_dt/json/project/<int:project_id>', type='http', auth='user', methods=['GET'])
+    def project_snapshot(self, project_id, **kw):
+        """ Compact JSON snapshot of a project and its task tree.
+
+            Answers ``304 Not Modified`` when the ``If-None-Match`` header
+            carries the current ETag, without reading the task table.
+        """
+        project = request.env['project.dt'].browse(project_id).exists()
+        if not project:
+            raise NotFound()
+        try:
+            project.check_access_rights('read')
+            project.check_access_rule('read')
+        except AccessError:
+            raise NotFound()
+
+        etag = project._get_snapshot_etag_dt()
+        headers = [('ETag', '"%s"' % etag), ('Cache-Control', 'private, no-cache')]
+        if request.httprequest.if_none_match.contains(etag):
+            return Response(status=304, headers=headers)
+
+        body = json.dumps(project._get_snapshot_dt(), separators=(',', ':'))
+        return request.make_response(body, headers=headers + [('Content-Type', 'application/json')])
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import http
+from odoo.exceptions import AccessError, MissingError
+from odoo.http import request
+from odoo.osv import expression
+
+from odoo.addons.portal.controllers.portal import CustomerPortal
+
+
+class CustomerPortalDt(CustomerPortal):
+
+    _items_per_page_dt = 20
+
+    def _prepare_portal_layout_values(self):
+        values = super(CustomerPortalDt, self)._prepare_portal_layout_values()
+        values.update({
+            'dt_project_count': request.env['project.dt']._portal_count_dt(),
+            'dt_task_count': request.env['task.dt']._portal_count_dt(),
+        })
+        return values
+
+    def _dt_after(self, after):
+        try:
+            return int(after) if after else None
+        except ValueError:
+            return None
+
+    @http.route(['/my/dt/projects'], type='http', auth='user', website=True)
+    def portal_my_dt_projects(self, after=None, **kw):
+        Project = request.env['project.dt']
+        projects, next_after = Project._portal_page_dt(
+            Project._portal_domain_dt(), after=self._dt_after(after), limit=self._items_per_page_dt)
+        values = self._prepare_portal_layout_values()
+        values.update({
+            'projects': projects,
+            'page_name': 'dt_project',
+            'default_url': '/my/dt/projects',
+            'next_after': next_after,
+            'is_first_page': not after,
+        })
+        return request.render('project_dt.portal_my_dt_projects', values)
+
+    @http.route(['/my/dt/project/<int:project_id>'], type='http', auth='user', website=True)
+    def portal_my_dt_project(self, project_id, access_token=None, **kw):
+        try:
+            project = self._document_check_access('project.dt', project_id, access_token)
+        except (AccessError, MissingError):
+            return request.redirect('/my')
+        values = {'project': project, 'page_name': 'dt_project'}
+        return request.render('project_dt.portal_my_dt_project', values)
+
+    @http.route(['/my/dt/tasks'], type='http', auth='user', website=True)
+    def portal_my_dt_tasks(self, after=None, project_id=None, **kw):
+        Task = request.env['task.dt']
+        domain = Task._portal_domain_dt()
+        project_id = self._dt_after(project_id)
+        if project_id:
+            domain = expression.AND([domain, [('project_id', '=', project_id)]])
+        tasks, next_after = Task._portal_page_dt(domain, after=self._dt_after(after), limit=self._items_per_page_dt)
+        values = self._prepare_portal_layout_values()
+        values.update({
+            'tasks': tasks,
+            'page_name': 'dt_task',
+            'default_url': '/my/dt/tasks',
+            'project_id': project_id,
+            'next_after': next_after,
+            'is_first_page': not after,
+        })
+        return request.render('project_dt.portal_my_dt_tasks', values)
+
+    @http.route(['/my/dt/task/<int:task_id>'], type='http', auth='user', website=True)
+    def portal_my_dt_task(self, task_id, access_token=None, **kw):
+        try:
+            task = self._document_check_access('task.dt', task_id, access_token)
+        except (AccessError, MissingError):
+            return request.redirect('/my')
+        values = {'task': task, 'page_name': 'dt_task', 'user': request.env.user}
+        return request.render('project_dt.portal_my_dt_task', values)
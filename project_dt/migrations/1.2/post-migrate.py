@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """ The schedule columns are new: seed them with a full pass, the data
+        file doing it is only loaded on install. """
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['project.dt']._schedule_all_dt()
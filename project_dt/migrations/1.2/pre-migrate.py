@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+
+def migrate(cr, version):
+    """ task_tags_rel_dt used to keep task ids in ``tags_dt_id`` and tag ids
+        in ``task_dt_id``; swap the column names so each holds what it says.
+        The foreign keys follow the columns. """
+    cr.execute("""
+        SELECT kcu.column_name
+          FROM information_schema.table_constraints tc
+          JOIN information_schema.key_column_usage kcu ON kcu.constraint_name = tc.constraint_name
+          JOIN information_schema.constraint_column_usage ccu ON ccu.constraint_name = tc.constraint_name
+         WHERE tc.table_name = 'task_tags_rel_dt'
+           AND tc.constraint_type = 'FOREIGN KEY'
+           AND ccu.table_name = 'task_dt'
+    """)
+    row = cr.fetchone()
+    if row and row[0] == 'tags_dt_id':
+        cr.execute('ALTER TABLE task_tags_rel_dt RENAME COLUMN tags_dt_id TO tmp_task_dt_id')
+        cr.execute('ALTER TABLE task_tags_rel_dt RENAME COLUMN task_dt_id TO tags_dt_id')
+        cr.execute('ALTER TABLE task_tags_rel_dt RENAME COLUMN tmp_task_dt_id TO task_dt_id')
@@ -2,6 +2,20 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
 from . import project_dt
+from . import project_dt_fulltext
+from . import project_dt_json
+from . import project_dt_portal
+from . import project_dt_transition
+from . import project_dt_schedule
+from . import project_dt_archive
+from . import project_dt_tags
+from . import project_dt_membership
+from . import project_dt_snapshot
+from . import project_dt_recompute
+from . import project_dt_documents
+from . import project_dt_bus
+from . import project_dt_assign
+from . import project_dt_kanban
 #from . import res_config_settings
 #from . import res_partner
 #from . import digest
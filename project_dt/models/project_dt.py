@@ -150,13 +150,13 @@ class ProjectDt(models.Model):
     def tb_doc_view(self):
         self.ensure_one()
         domain = [
-            ('res_id', '=', self.id)]
+            ('res_model', '=', self._name), ('res_id', '=', self.id)]
         return {
             'name': _('Project Attachments'),
             'domain': domain,
             'res_model': 'ir.attachment',
             'type': 'ir.actions.act_window',
-            'view_id': False,
+            'views': [(self.env.ref('project_dt.view_attachment_kanban_dt').id, 'kanban'), (False, 'tree'), (False, 'form')],
             'view_mode': 'kanban,tree,form',
             'view_type': 'form',
             'help': _('''<p class="o_view_nocontent_smiling_face">
@@ -501,14 +501,14 @@ class TaskDt(models.Model):
     def tb_doc_view_task(self):
         self.ensure_one()
         domain = [
-            ('res_id', '=', self.id)]
+            ('res_model', '=', self._name), ('res_id', '=', self.id)]
         return {
             'name': _('Task Attachments'),
             'domain': domain,
             'res_model': 'ir.attachment',
             'type': 'ir.actions.act_window',
-            'view_id': False,
-            'view_mode': 'tree,form',
+            'views': [(self.env.ref('project_dt.view_attachment_kanban_dt').id, 'kanban'), (False, 'tree'), (False, 'form')],
+            'view_mode': 'kanban,tree,form',
             'view_type': 'form',
             'help': _('''<p class="o_view_nocontent_smiling_face">
                         Documents are attached to the tasks and issues of your project.</p><p>
@@ -620,6 +620,8 @@ class TaskDt(models.Model):
     #is_sub_task = fields.Boolean(string="Sub Task", compute='_compute_is_subtask', store=True)
     project_stage_id = fields.Many2one('project.task.type.dt',string='Type of project to which the task belongs', track_visibility='onchange', copy=True)#Даалгаварт хамаарах төслийн төлөв
     is_sub_task = fields.Boolean(string="Sub Task", default=False)
+    date_assign = fields.Datetime(string='Assigning Date', index=True, copy=False, readonly=True)
+    date_last_stage_update = fields.Datetime(string='Last Stage Update', index=True, copy=False, readonly=True)
     
     parent_id = fields.Many2one('task.dt', string='Parent Task')
     child_ids = fields.One2many('task.dt', 'parent_id', string='Subtasks', copy=True)
@@ -636,7 +638,7 @@ class TaskDt(models.Model):
     user_email = fields.Char(related='user_id.email', string='User Email', readonly=True, related_sudo=False)
     
     #tag_ids = fields.Many2many('tags.dt', string='Tags')
-    tag_ids = fields.Many2many('tags.dt', 'task_tags_rel_dt', 'tags_dt_id', 'task_dt_id', string='Tags DT', copy=False)
+    tag_ids = fields.Many2many('tags.dt', 'task_tags_rel_dt', 'task_dt_id', 'tags_dt_id', string='Tags DT', copy=False)
     kanban_state = fields.Selection([
         ('normal', 'Grey'),
         ('done', 'Green'),
@@ -807,7 +809,7 @@ class TagsDt(models.Model):
 
     name = fields.Char(required=True)
     color = fields.Integer(string='Color Index')
-    task_dt_ids = fields.Many2many('task.dt', 'task_tags_rel_dt', 'task_dt_id', 'tags_dt_id', string='Tasks DT')
+    task_dt_ids = fields.Many2many('task.dt', 'task_tags_rel_dt', 'tags_dt_id', 'task_dt_id', string='Tasks DT')
 #===============================================================================
 # 
 #     _sql_constraints = [
@@ -837,7 +839,7 @@ class Employee(models.Model):
     def tb_project_view_dt(self):
         self.ensure_one()
         domain = [
-            ('members', '=', self.user_id.id),('members', '!=', False)]
+            ('membership_user_ids', '=', self.user_id.id),('membership_user_ids', '!=', False)]
         return {
             'name': _('DT Projects'),
             'domain': domain,
@@ -856,9 +858,9 @@ class Employee(models.Model):
         }
     
     def _compute_project_count_dt(self):
+        counts = self.env['project.dt']._count_by_user_dt(self.mapped('user_id').ids)
         for emp in self:
-            projects = self.env['project.dt'].search([('members', '=', emp.user_id.id),('members', '!=', False)]).ids
-            emp.project_count_dt = len(projects)
+            emp.project_count_dt = counts.get(emp.user_id.id, 0)
         
     
 
@@ -884,9 +886,11 @@ class Employee(models.Model):
         }
     
     def _compute_task_count_reviewer_dt(self):
+        data = self.env['task.dt'].read_group(
+            [('reviewer_id', 'in', self.mapped('user_id').ids)], ['reviewer_id'], ['reviewer_id'])
+        counts = dict((item['reviewer_id'][0], item['reviewer_id_count']) for item in data)
         for emp in self:
-            tasks = self.env['task.dt'].search([('reviewer_id', '=', emp.user_id.id),('reviewer_id', '!=', False)]).ids
-            emp.task_count_reviewer_dt = len(tasks)
+            emp.task_count_reviewer_dt = counts.get(emp.user_id.id, 0)
 
     def tb_task_user_view_dt(self):
         self.ensure_one()
@@ -910,9 +914,11 @@ class Employee(models.Model):
         }
     
     def _compute_task_count_user_dt(self):
+        data = self.env['task.dt'].read_group(
+            [('user_id', 'in', self.mapped('user_id').ids)], ['user_id'], ['user_id'])
+        counts = dict((item['user_id'][0], item['user_id_count']) for item in data)
         for emp in self:
-            tasks = self.env['task.dt'].search([('user_id', '=', emp.user_id.id),('user_id', '!=', False)]).ids
-            emp.task_count_user_dt = len(tasks)
+            emp.task_count_user_dt = counts.get(emp.user_id.id, 0)
 
     def tb_task_swap_view_dt(self):
         self.ensure_one()
@@ -936,9 +942,11 @@ class Employee(models.Model):
         }
     
     def _compute_task_count_swap_dt(self):
+        data = self.env['task.dt'].read_group(
+            [('swap_id', 'in', self.mapped('user_id').ids)], ['swap_id'], ['swap_id'])
+        counts = dict((item['swap_id'][0], item['swap_id_count']) for item in data)
         for emp in self:
-            tasks = self.env['task.dt'].search([('swap_id', '=', emp.user_id.id),('swap_id', '!=', False)]).ids
-            emp.task_count_swap_dt = len(tasks)
+            emp.task_count_swap_dt = counts.get(emp.user_id.id, 0)
         
 
 
@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import logging
+import threading
+from datetime import timedelta
+
+from odoo import api, fields, models, _
+from odoo.exceptions import AccessError, UserError
+from odoo.tools.sql import index_exists, table_exists
+
+_logger = logging.getLogger(__name__)
+
+ARCHIVE_AGE_PARAM = 'project_dt.archive_after_days'
+ARCHIVE_BATCH_SIZE = 200
+# tables pointing at project.dt and task.dt records by (model, id), with
+# the name of their model column
+ARCHIVED_DOCUMENT_TABLES = [
+    ('mail_message', 'model'),
+    ('mail_followers', 'res_model'),
+    ('mail_activity', 'res_model'),
+    ('rating_rating', 'res_model'),
+]
+
+
+class ProjectDtArchive(models.Model):
+    """ Searchable summary of a project moved to the archive tier.
+
+        The rows of the project, of its tasks and of every table hanging off
+        them are kept as jsonb in ``project_dt_archive_row`` and removed from
+        the hot tables; ``action_restore`` puts them back with the same ids.
+        Their attachments are moved onto the archive record meanwhile.
+    """
+    _name = 'project.dt.archive'
+    _description = 'Archived Project DT'
+    _order = 'archived_date desc, id desc'
+
+    project_ref = fields.Integer('Original project id', required=True, readonly=True, index=True)
+    name = fields.Char('Project name', readonly=True)
+    approved_number = fields.Char('Project code', readonly=True, index=True)
+    partner_id = fields.Many2one('res.partner', string='Project family name', readonly=True, ondelete='set null')
+    user_id = fields.Many2one('res.users', string='Project Manager', readonly=True, ondelete='set null')
+    company_id = fields.Many2one('res.company', string='Company', readonly=True, ondelete='set null')
+    date_deadline = fields.Date('Project deadline', readonly=True)
+    date_done = fields.Datetime('Last activity', readonly=True)
+    archived_date = fields.Datetime('Archived on', readonly=True)
+    task_count = fields.Integer('Tasks', readonly=True)
+    planned = fields.Float('Planned', readonly=True)
+
+    _sql_constraints = [
+        ('project_ref_uniq', 'unique (project_ref)', "This project is already archived."),
+    ]
+
+    @api.model_cr
+    def init(self):
+        cr = self._cr
+        if not table_exists(cr, 'project_dt_archive_row'):
+            cr.execute("""
+                CREATE TABLE project_dt_archive_row (
+                    project_id integer NOT NULL,
+                    table_name varchar NOT NULL,
+                    data jsonb NOT NULL
+                )
+            """)
+        if not index_exists(cr, 'project_dt_archive_row_project_index'):
+            cr.execute("""CREATE INDEX project_dt_archive_row_project_index
+                          ON project_dt_archive_row (project_id, table_name)""")
+
+    @api.model
+    def _archived_tables(self):
+        """ Tables holding rows of archived projects, in restore order, as
+            ``(table, from, where, project)`` SQL fragments: the rows of the
+            projects ``%(ids)s`` are ``SELECT FROM <from> WHERE <where>``, and
+            ``project`` gives their project id. Every table referencing
+            task_dt or project_dt with ON DELETE CASCADE must be listed,
+            otherwise its rows are lost when the project is archived.
+        """
+        tables = [
+            ('project_dt', 'project_dt r', 'r.id IN %(ids)s', 'r.id'),
+            ('task_dt', 'task_dt r', 'r.project_id IN %(ids)s', 'r.project_id'),
+        ]
+        relations = set()
+        for model_name in ('project.dt', 'task.dt'):
+            for field in self.env[model_name]._fields.values():
+                if field.type != 'many2many' or not field.store or field.relation in relations:
+                    continue
+                relations.add(field.relation)
+                if model_name == 'project.dt':
+                    tables.append((field.relation, '"%s" r' % field.relation,
+                                   'r.%s IN %%(ids)s' % field.column1, 'r.%s' % field.column1))
+                else:
+                    tables.append((field.relation, '"%s" r JOIN task_dt t ON t.id = r.%s' % (field.relation, field.column1),
+                                   't.project_id IN %(ids)s', 't.project_id'))
+        tables.append(('task_stage_transition_dt', 'task_stage_transition_dt r', 'r.project_id IN %(ids)s', 'r.project_id'))
+        tables.append(('project_dt_snapshot', 'project_dt_snapshot r', 'r.project_id IN %(ids)s', 'r.project_id'))
+        return tables + self._archived_document_tables()
+
+    @api.model
+    def _document_rows_sql(self, alias, model_column):
+        """ ``(join, where, project)`` SQL fragments selecting the rows of
+            ``alias`` attached by (model, res_id) to the projects ``%(ids)s``
+            or to their tasks. """
+        return (
+            "LEFT JOIN task_dt {alias}_t ON {alias}.{model} = 'task.dt' AND {alias}_t.id = {alias}.res_id".format(
+                alias=alias, model=model_column),
+            "(({alias}.{model} = 'project.dt' AND {alias}.res_id IN %(ids)s) OR {alias}_t.project_id IN %(ids)s)".format(
+                alias=alias, model=model_column),
+            "CASE WHEN {alias}.{model} = 'project.dt' THEN {alias}.res_id ELSE {alias}_t.project_id END".format(
+                alias=alias, model=model_column),
+        )
+
+    @api.model
+    def _cascade_children(self, table):
+        """ ``[(table, column)]`` of the single column foreign keys deleting
+            their rows with the rows of ``table``. """
+        self._cr.execute("""
+            SELECT child.relname, att.attname
+              FROM pg_constraint c
+              JOIN pg_class child ON child.oid = c.conrelid
+              JOIN pg_class parent ON parent.oid = c.confrelid
+              JOIN pg_attribute att ON att.attrelid = c.conrelid AND att.attnum = c.conkey[1]
+             WHERE c.contype = 'f' AND c.confdeltype = 'c' AND array_length(c.conkey, 1) = 1
+               AND parent.relname = %s AND child.relname != parent.relname
+          ORDER BY child.relname, att.attname
+        """, (table,))
+        return self._cr.fetchall()
+
+    @api.model
+    def _archived_document_tables(self):
+        """ Messages, followers, activities and ratings of the projects and
+            their tasks, and the rows deleted with them by cascade, in the
+            ``_archived_tables`` format, parents before children. """
+        roots = {table: column for table, column in ARCHIVED_DOCUMENT_TABLES if table_exists(self._cr, table)}
+        parents = {}
+        pending = list(roots)
+        while pending:
+            table = pending.pop(0)
+            for child, column in self._cascade_children(table):
+                if child not in parents:
+                    parents[child] = []
+                    if child not in roots:
+                        pending.append(child)
+                if (table, column) not in parents[child]:
+                    parents[child].append((table, column))
+
+        # topological order, so restoring never breaks a foreign key
+        ordered = []
+        remaining = set(roots) | set(parents)
+        while remaining:
+            ready = sorted(table for table in remaining
+                           if not any(parent in remaining for parent, dummy in parents.get(table, [])))
+            if not ready:
+                raise UserError(_("Cyclic cascades between the tables %s.") % ', '.join(sorted(remaining)))
+            ordered.extend(ready)
+            remaining.difference_update(ready)
+
+        tables = {}
+        for table in ordered:
+            joins, wheres, projects = [], [], []
+            if table in roots:
+                join, where, project = self._document_rows_sql('r', roots[table])
+                joins.append(join)
+                wheres.append(where)
+                projects.append('CASE WHEN %s THEN %s END' % (where, project))
+            for index, (parent, column) in enumerate(parents.get(table, [])):
+                dummy, parent_from, parent_where, parent_project = tables[parent]
+                joins.append('LEFT JOIN (SELECT r.id, {project} AS project_id FROM {from_clause} WHERE {where}) p{index} '
+                             'ON p{index}.id = r."{column}"'.format(project=parent_project, from_clause=parent_from,
+                                                                  where=parent_where, index=index, column=column))
+                wheres.append('p%d.id IS NOT NULL' % index)
+                projects.append('p%d.project_id' % index)
+            tables[table] = (
+                table,
+                '"%s" r %s' % (table, ' '.join(joins)),
+                '(%s)' % ' OR '.join(wheres),
+                'coalesce(%s)' % ', '.join(projects),
+            )
+        return [tables[table] for table in ordered]
+
+    @api.model
+    def _candidate_project_ids(self, limit=ARCHIVE_BATCH_SIZE):
+        """ Projects whose tasks are all in a last stage and untouched for
+            the configured number of days. """
+        days = int(self.env['ir.config_parameter'].sudo().get_param(ARCHIVE_AGE_PARAM, 365))
+        cutoff = fields.Datetime.now() - timedelta(days=days)
+        self._cr.execute("""
+            SELECT p.id FROM project_dt p
+             WHERE p.is_template_project IS NOT TRUE
+               AND p.write_date < %(cutoff)s
+               AND EXISTS (SELECT 1 FROM task_dt t WHERE t.project_id = p.id)
+               AND NOT EXISTS (
+                    SELECT 1 FROM task_dt t
+                 LEFT JOIN project_task_type_dt s
+                        ON s.id = CASE WHEN t.parent_id IS NULL THEN t.stage_id ELSE t.stage_id_sub END
+                     WHERE t.project_id = p.id
+                       AND (s.is_last_stage IS NOT TRUE OR t.write_date >= %(cutoff)s))
+               AND NOT EXISTS (SELECT 1 FROM project_dt o WHERE o.subtask_project_id = p.id AND o.id != p.id)
+          ORDER BY p.id
+             LIMIT %(limit)s
+        """, {'cutoff': cutoff, 'limit': limit})
+        return [row[0] for row in self._cr.fetchall()]
+
+    @api.model
+    def _archive_projects(self, project_ids):
+        """ Move the projects and their task trees to the archive tier with a
+            constant number of set-based statements. """
+        if not project_ids:
+            return self.browse()
+        cr = self._cr
+        params = {'ids': tuple(project_ids), 'uid': self.env.uid}
+        cr.execute("""
+            INSERT INTO project_dt_archive
+                   (project_ref, name, approved_number, partner_id, user_id, company_id, date_deadline,
+                    date_done, archived_date, task_count, planned, create_uid, create_date, write_uid, write_date)
+            SELECT p.id, p.name, p.approved_number, p.partner_id, p.user_id, p.company_id, p.date_deadline,
+                   greatest(p.write_date, max(t.write_date)), now() at time zone 'UTC',
+                   count(t.id), coalesce(sum(t.planned_hours), 0.0),
+                   %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM project_dt p LEFT JOIN task_dt t ON t.project_id = p.id
+             WHERE p.id IN %(ids)s
+          GROUP BY p.id
+         RETURNING id
+        """, params)
+        archive_ids = [row[0] for row in cr.fetchall()]
+
+        for table, from_clause, where_clause, project in self._archived_tables():
+            cr.execute("""
+                INSERT INTO project_dt_archive_row (project_id, table_name, data)
+                SELECT {project}, %(table)s, to_jsonb(r) FROM {from_clause} WHERE {where_clause}
+            """.format(project=project, from_clause=from_clause, where_clause=where_clause),
+                dict(params, table=table))
+
+        # the attachments stay in place, so their files stay referenced, but
+        # hang off the archive record: only project users can read them
+        join, where, project = self._document_rows_sql('r', 'res_model')
+        cr.execute("""
+            INSERT INTO project_dt_archive_row (project_id, table_name, data)
+            SELECT {project}, 'ir_attachment', jsonb_build_object('id', r.id, 'res_model', r.res_model, 'res_id', r.res_id)
+              FROM ir_attachment r {join} WHERE {where}
+        """.format(project=project, join=join, where=where), params)
+        cr.execute("""
+            UPDATE ir_attachment a SET res_model = 'project.dt.archive', res_id = ar.id
+              FROM project_dt_archive_row x JOIN project_dt_archive ar ON ar.project_ref = x.project_id
+             WHERE x.project_id IN %(ids)s AND x.table_name = 'ir_attachment' AND a.id = (x.data->>'id')::integer
+        """, params)
+        self.env['ir.attachment'].invalidate_cache(['res_model', 'res_id'])
+
+        # cascades take care of the relation tables, the transition log, the
+        # snapshots and the rows hanging off the messages and followers
+        for table, column in ARCHIVED_DOCUMENT_TABLES:
+            if table_exists(cr, table):
+                join, where, dummy = self._document_rows_sql('r', column)
+                cr.execute('DELETE FROM "{table}" WHERE id IN (SELECT r.id FROM "{table}" r {join} WHERE {where})'.format(
+                    table=table, join=join, where=where), params)
+        cr.execute("UPDATE project_dt SET subtask_project_id = NULL WHERE id IN %(ids)s", params)
+        cr.execute("DELETE FROM task_dt WHERE project_id IN %(ids)s", params)
+        cr.execute("DELETE FROM project_dt WHERE id IN %(ids)s", params)
+        self.env['task.dt'].invalidate_cache()
+        _logger.info("Archived %d projects DT", len(project_ids))
+        return self.browse(archive_ids)
+
+    @api.multi
+    def action_restore(self):
+        """ Put the archived projects back in the hot tables, same ids. """
+        if not self.env.user.has_group('project.group_project_manager'):
+            raise AccessError(_("Only project managers can restore archived projects."))
+        if not self:
+            return True
+        cr = self._cr
+        project_ids = tuple(self.mapped('project_ref'))
+        cr.execute("SELECT id FROM project_dt WHERE id IN %s", (project_ids,))
+        if cr.fetchall():
+            raise UserError(_("Some of these projects are already restored."))
+        for table, dummy, dummy, dummy in self._archived_tables():
+            cr.execute("""
+                INSERT INTO "{table}"
+                SELECT (jsonb_populate_record(NULL::"{table}", data)).*
+                  FROM project_dt_archive_row
+                 WHERE project_id IN %s AND table_name = %s
+            """.format(table=table), (project_ids, table))
+        # before unlink(), which deletes the attachments of the archive records
+        cr.execute("""
+            UPDATE ir_attachment a SET res_model = x.data->>'res_model', res_id = (x.data->>'res_id')::integer
+              FROM project_dt_archive_row x
+             WHERE x.project_id IN %s AND x.table_name = 'ir_attachment' AND a.id = (x.data->>'id')::integer
+        """, (project_ids,))
+        cr.execute("DELETE FROM project_dt_archive_row WHERE project_id IN %s", (project_ids,))
+        self.env['ir.attachment'].invalidate_cache(['res_model', 'res_id'])
+        self.unlink()
+        self.env['project.dt'].invalidate_cache()
+        self.env['task.dt'].invalidate_cache()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'project.dt',
+            'view_mode': 'tree,form',
+            'domain': [('id', 'in', list(project_ids))],
+            'name': _('Restored projects'),
+        }
+
+    @api.model
+    def _cron_archive_projects(self):
+        """ Archive finished projects batch by batch, committing in between
+            so locks on the hot tables are held briefly. """
+        auto_commit = not getattr(threading.currentThread(), 'testing', False)
+        while True:
+            project_ids = self._candidate_project_ids()
+            if not project_ids:
+                break
+            self._archive_projects(project_ids)
+            if not auto_commit:
+                break
+            self._cr.commit()
+        return True
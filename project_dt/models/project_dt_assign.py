@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import heapq
+from collections import defaultdict
+
+from odoo import api, models, _
+from odoo.exceptions import AccessError
+
+ASSIGN_ROLES_DT = ('reviewer_id', 'swap_id')
+
+
+def balance(tasks, candidates, load, roles=ASSIGN_ROLES_DT):
+    """ Greedy load balancing of task roles over candidates.
+
+        Tasks are taken by decreasing planned hours and each role goes to the
+        least loaded allowed candidate, picked from a priority queue keyed by
+        ``(hours, tasks, user)``. A user never gets two roles on the same
+        task, nor a role on a task assigned to them.
+
+        :param tasks: ``[(task_id, hours, {role or 'user_id': user_id})]``,
+            only the roles to fill are missing from the dict
+        :param candidates: ``{task_id: tuple of user ids}``
+        :param load: ``{user_id: open planned hours}``, updated in place
+        :return: ``{(role, user_id): [task_id]}``
+    """
+    count = defaultdict(int)
+    queues = {}
+    result = defaultdict(list)
+    for task_id, hours, assigned in sorted(tasks, key=lambda task: -(task[1] or 0.0)):
+        pool = candidates.get(task_id)
+        if not pool:
+            continue
+        queue = queues.get(pool)
+        if queue is None:
+            queue = queues[pool] = [(load.get(user, 0.0), 0, user) for user in pool]
+            heapq.heapify(queue)
+        for role in roles:
+            if assigned.get(role):
+                continue
+            taken = set(assigned.values())
+            skipped = []
+            while queue:
+                entry = heapq.heappop(queue)
+                user = entry[2]
+                if entry[:2] != (load.get(user, 0.0), count[user]):
+                    # stale entry: the user got work from another queue
+                    heapq.heappush(queue, (load.get(user, 0.0), count[user], user))
+                    continue
+                if user in taken:
+                    skipped.append(entry)
+                    continue
+                assigned[role] = user
+                load[user] = load.get(user, 0.0) + (hours or 0.0)
+                count[user] += 1
+                heapq.heappush(queue, (load[user], count[user], user))
+                result[(role, user)].append(task_id)
+                break
+            for entry in skipped:
+                heapq.heappush(queue, entry)
+    return result
+
+
+class ProjectDt(models.Model):
+    _inherit = 'project.dt'
+
+    @api.multi
+    def _assign_candidates_dt(self):
+        """ ``{project_id: tuple of user ids}``: the members of the project
+            team, or the project members when there is no team. """
+        return {
+            project.id: tuple(sorted((project.team_id.team_members if project.team_id else project.members).ids))
+            for project in self
+        }
+
+    @api.multi
+    def action_auto_assign_dt(self):
+        """ Fill the missing reviewers and swap users of the open tasks. """
+        tasks = self.env['task.dt'].search([
+            ('project_id', 'in', self.ids), '|', ('reviewer_id', '=', False), ('swap_id', '=', False),
+            '|', '&', ('parent_id', '=', False), ('stage_id.is_last_stage', '=', False),
+                 '&', ('parent_id', '!=', False), ('stage_id_sub.is_last_stage', '=', False)])
+        return tasks.action_auto_assign_dt()
+
+
+class TaskDt(models.Model):
+    _inherit = 'task.dt'
+
+    @api.model
+    def _open_hours_by_user_dt(self, user_ids):
+        """ Planned hours of the open tasks where each user is assignee,
+            reviewer or swap user, in one aggregation. """
+        if not user_ids:
+            return {}
+        self._cr.execute("""
+            SELECT r.uid, sum(r.hours) FROM (
+                SELECT DISTINCT t.id, u.uid, coalesce(t.planned_hours, 0.0) AS hours
+                  FROM task_dt t
+             LEFT JOIN project_task_type_dt s
+                    ON s.id = CASE WHEN t.parent_id IS NULL THEN t.stage_id ELSE t.stage_id_sub END
+            CROSS JOIN LATERAL unnest(ARRAY[t.user_id, t.reviewer_id, t.swap_id]) AS u(uid)
+                 WHERE t.active AND s.is_last_stage IS NOT TRUE AND u.uid IN %s
+            ) r
+          GROUP BY r.uid
+        """, (tuple(user_ids),))
+        return dict(self._cr.fetchall())
+
+    @api.multi
+    def action_auto_assign_dt(self, roles=ASSIGN_ROLES_DT):
+        """ Fill the empty ``roles`` of the tasks, balancing the open
+            planned hours of the project team members. """
+        if not self.env.user.has_group('project.group_project_manager'):
+            raise AccessError(_("Only project managers can assign reviewers and swap users automatically."))
+        tasks = self.filtered(lambda task: task.project_id and any(not task[role] for role in roles))
+        if not tasks:
+            return True
+        by_project = tasks.mapped('project_id')._assign_candidates_dt()
+        candidates = {task.id: by_project[task.project_id.id] for task in tasks}
+        load = self._open_hours_by_user_dt({user for pool in by_project.values() for user in pool})
+        batch = [
+            (task.id, task.planned_hours, {name: task[name].id for name in ('user_id',) + tuple(roles) if task[name]})
+            for task in tasks
+        ]
+        # one write per (role, user) pair
+        for (role, user_id), task_ids in balance(batch, candidates, load, roles).items():
+            self.browse(task_ids).write({role: user_id})
+        return True
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import logging
+
+import odoo
+from odoo import api, models, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+KANBAN_MESSAGE_TYPE = 'project_dt.kanban'
+# server side channel, only added to the polling of project users
+KANBAN_CHANNEL = 'project_dt.kanban'
+
+
+def kanban_channel_dt(dbname):
+    return (dbname, KANBAN_CHANNEL)
+
+
+def _publish_kanban_dt(dbname, buffer):
+    """ Send the events of a committed transaction, one message per model. """
+    try:
+        with api.Environment.manage(), odoo.registry(dbname).cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {'active_test': False})
+            env['task.dt']._send_kanban_events_dt(buffer)
+    except Exception:
+        _logger.exception("Could not publish the kanban changes")
+
+
+class KanbanBusMixinDt(models.AbstractModel):
+    """ Collect the ids touched by a transaction and publish compact kanban
+        change events on the bus once it is committed.
+
+        Changes are buffered on the cursor, so any number of writes in one
+        transaction give a single message per model; a rollback drops them.
+        The messages only carry ids, and the project of the tasks so that
+        views can ignore the other projects: clients read the changed cards
+        back with their own access rights.
+    """
+    _name = 'kanban.bus.mixin.dt'
+    _description = 'Kanban live updates DT'
+
+    def _kanban_buffer_dt(self):
+        cr = self._cr
+        buffer = getattr(cr, '_kanban_buffer_dt', None)
+        if buffer is None:
+            buffer = cr._kanban_buffer_dt = {'task.dt': set(), 'project.dt': set(), 'removed': {}}
+
+            def on_commit():
+                if getattr(cr, '_kanban_buffer_dt', None) is buffer:
+                    del cr._kanban_buffer_dt
+                _publish_kanban_dt(cr.dbname, buffer)
+
+            def on_rollback():
+                if getattr(cr, '_kanban_buffer_dt', None) is buffer:
+                    del cr._kanban_buffer_dt
+
+            cr.after('commit', on_commit)
+            cr.after('rollback', on_rollback)
+        return buffer
+
+    def _kanban_notify_dt(self, removed=None):
+        """ Mark the records as changed; ``removed`` maps the ids of tasks
+            leaving a project to that project. """
+        if self.pool._init:
+            return
+        buffer = self._kanban_buffer_dt()
+        buffer[self._name].update(self.ids)
+        if removed:
+            buffer['removed'].update(removed)
+
+    @api.model
+    def _send_kanban_events_dt(self, buffer):
+        tasks = [{'id': task_id, 'project_id': project_id, 'removed': True}
+                 for task_id, project_id in buffer['removed'].items()]
+        if buffer['task.dt']:
+            self._cr.execute("SELECT id, project_id, active FROM task_dt WHERE id IN %s AND project_id IS NOT NULL",
+                             (tuple(buffer['task.dt']),))
+            for task_id, project_id, active in self._cr.fetchall():
+                values = {'id': task_id, 'project_id': project_id}
+                if not active:
+                    values['removed'] = True
+                tasks.append(values)
+        project_ids = set(buffer['project.dt']) | {values['project_id'] for values in tasks}
+
+        channel = kanban_channel_dt(self._cr.dbname)
+        notifications = []
+        if tasks:
+            notifications.append((channel, {'type': KANBAN_MESSAGE_TYPE, 'model': 'task.dt', 'records': tasks}))
+        if project_ids:
+            notifications.append((channel, {'type': KANBAN_MESSAGE_TYPE, 'model': 'project.dt',
+                                            'records': [{'id': project_id} for project_id in sorted(project_ids)]}))
+        if notifications:
+            self.env['bus.bus'].sendmany(notifications)
+
+
+class ProjectDt(models.Model):
+    _name = 'project.dt'
+    _inherit = ['project.dt', 'kanban.bus.mixin.dt']
+
+    @api.model
+    def create(self, vals):
+        project = super(ProjectDt, self).create(vals)
+        project._kanban_notify_dt()
+        return project
+
+    @api.multi
+    def write(self, vals):
+        result = super(ProjectDt, self).write(vals)
+        self._kanban_notify_dt()
+        return result
+
+
+class TaskDt(models.Model):
+    _name = 'task.dt'
+    _inherit = ['task.dt', 'kanban.bus.mixin.dt']
+
+    @api.model
+    def create(self, vals):
+        task = super(TaskDt, self).create(vals)
+        task._kanban_notify_dt()
+        return task
+
+    @api.multi
+    def write(self, vals):
+        removed = {}
+        if 'project_id' in vals:
+            removed = {task.id: task.project_id.id for task in self
+                       if task.project_id and task.project_id.id != vals['project_id']}
+        result = super(TaskDt, self).write(vals)
+        self.env['project.dt'].browse(set(removed.values()))._kanban_notify_dt()
+        self._kanban_notify_dt(removed)
+        return result
+
+    @api.multi
+    def unlink(self):
+        removed = {task.id: task.project_id.id for task in self if task.project_id}
+        self.env['project.dt'].browse(set(removed.values()))._kanban_notify_dt()
+        self.browse()._kanban_notify_dt(removed)
+        return super(TaskDt, self).unlink()
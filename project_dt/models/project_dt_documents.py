@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import base64
+import hashlib
+import io
+import logging
+import os
+import tempfile
+
+from PIL import Image
+
+from odoo import api, models
+from odoo.tools import config
+
+_logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+# bodies up to this size are read back once to extract their text
+INDEX_MAX_SIZE = 16 * 1024 * 1024
+THUMBNAIL_SIZE = 256
+THUMBNAIL_DIR = 'thumbnails_dt'
+# unreadable, malformed or hostile images: no thumbnail rather than a crash;
+# DecompressionBombError only exists since Pillow 5
+THUMBNAIL_ERRORS = (IOError, OSError, SyntaxError, ValueError, getattr(Image, 'DecompressionBombError', ValueError))
+
+
+class Attachment(models.Model):
+    """ Content-addressed, streamed storage of the design documents.
+
+        Blobs live in the filestore under their sha1, which is the path the
+        standard storage already uses, so identical files uploaded to many
+        projects or tasks are written once and shared by their attachments.
+        Uploads are hashed and copied chunk by chunk into the filestore, and
+        downloads are served straight from the file. Image thumbnails are
+        rendered on first request and cached next to the filestore, keyed by
+        checksum, so kanban listings never read the file bodies.
+    """
+    _inherit = 'ir.attachment'
+
+    _dt_models = ('project.dt', 'task.dt')
+
+    @api.model
+    def _dt_filestore(self):
+        return config.filestore(self._cr.dbname)
+
+    @api.model
+    def _dt_store_stream(self, stream):
+        """ Copy ``stream`` into the filestore, hashing it on the way.
+
+            :return: ``(store_fname, checksum, file_size)``; when a file with
+                the same content already exists it is reused.
+        """
+        filestore = self._dt_filestore()
+        if not os.path.isdir(filestore):
+            os.makedirs(filestore)
+        sha, size = hashlib.sha1(), 0
+        fd, tmp_path = tempfile.mkstemp(dir=filestore, prefix='upload_dt_')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in iter(lambda: stream.read(STREAM_CHUNK_SIZE), b''):
+                    sha.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            checksum = sha.hexdigest()
+            fname, full_path = self._get_path(None, checksum)
+            if os.path.isfile(full_path):
+                os.unlink(tmp_path)
+            else:
+                os.rename(tmp_path, full_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return fname, checksum, size
+
+    @api.model
+    def _dt_create_from_stream(self, stream, filename, mimetype, res_model, res_id, doc_type_id=False):
+        """ Create a document attachment without loading its body. """
+        values = {
+            'name': filename,
+            'datas_fname': filename,
+            'mimetype': mimetype,
+            'res_model': res_model,
+            'res_id': res_id,
+            'doc_type': doc_type_id,
+        }
+        # nothing reaches the filestore for a user who may not attach here
+        self.browse().check('write', values=values)
+        fname, checksum, size = self._dt_store_stream(stream)
+        # like _file_write(): the file goes away unless a committed
+        # attachment refers to it, so a failed create leaves nothing behind
+        self._mark_for_gc(fname)
+        values['store_fname'] = fname
+        if size <= INDEX_MAX_SIZE:
+            with open(self._full_path(fname), 'rb') as body:
+                values['index_content'] = self._index(body.read(), filename, mimetype)
+        attachment = self.create(values)
+        # create() drops these computed-from-datas values
+        self._cr.execute("UPDATE ir_attachment SET checksum = %s, file_size = %s WHERE id = %s",
+                         (checksum, size, attachment.id))
+        attachment.invalidate_cache(['checksum', 'file_size'], attachment.ids)
+        return attachment
+
+    @api.multi
+    def _dt_open(self):
+        """ Binary file object on the body of the attachment. """
+        self.ensure_one()
+        if self.store_fname:
+            return open(self._full_path(self.store_fname), 'rb')
+        return io.BytesIO(base64.b64decode(self.sudo().db_datas or b''))
+
+    @api.multi
+    def _dt_thumbnail_path(self):
+        """ Path of the cached thumbnail, rendered if missing. Only the first
+            request for a given content decodes the image. """
+        self.ensure_one()
+        if not (self.mimetype or '').startswith('image/') or not self.checksum:
+            return None
+        directory = os.path.join(self._dt_filestore(), THUMBNAIL_DIR, self.checksum[:2])
+        path = os.path.join(directory, '%s_%d.png' % (self.checksum, THUMBNAIL_SIZE))
+        if os.path.isfile(path):
+            return path
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with self._dt_open() as source, os.fdopen(fd, 'wb') as tmp:
+                image = Image.open(source)
+                image.draft('RGB', (THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+                image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+                if image.mode not in ('RGB', 'RGBA'):
+                    image = image.convert('RGBA')
+                image.save(tmp, 'PNG')
+        except THUMBNAIL_ERRORS:
+            os.unlink(tmp_path)
+            _logger.info("Could not render the thumbnail of attachment %s", self.id, exc_info=True)
+            return None
+        os.rename(tmp_path, path)
+        return path
+
+    @api.model
+    def _file_gc(self):
+        """ Also drop the cached thumbnails of contents no longer stored. """
+        result = super(Attachment, self)._file_gc()
+        root = os.path.join(self._dt_filestore(), THUMBNAIL_DIR)
+        if not os.path.isdir(root):
+            return result
+        cached = {}
+        for directory, dummy, filenames in os.walk(root):
+            for filename in filenames:
+                cached.setdefault(filename.split('_')[0], []).append(os.path.join(directory, filename))
+        if cached:
+            self._cr.execute("SELECT DISTINCT checksum FROM ir_attachment WHERE checksum IN %s", (tuple(cached),))
+            for checksum in set(cached) - {row[0] for row in self._cr.fetchall()}:
+                for path in cached[checksum]:
+                    os.unlink(path)
+        return result
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+from odoo.tools.sql import column_exists, create_column, index_exists
+
+FTS_ATTACHMENT_PARAM = 'project_dt.fts_attachments'
+
+
+class FulltextMixinDt(models.AbstractModel):
+    """ PostgreSQL full-text index over a few text columns of the table.
+
+        The ``fts_vector_dt`` tsvector column is created and backfilled at
+        module install/update, kept up to date from ``create``/``write`` for
+        the touched rows only, and covered by a GIN index so that both the
+        search view filter and ``search_fulltext`` avoid scanning with ilike.
+    """
+    _name = 'fulltext.mixin.dt'
+    _description = 'Full-text search DT'
+
+    _fts_config = 'simple'
+    _fts_fields = ['name', 'description']
+
+    fts_query_dt = fields.Char('Full text', compute='_compute_fts_query_dt', search='_search_fts_query_dt')
+
+    def _compute_fts_query_dt(self):
+        for record in self:
+            record.fts_query_dt = False
+
+    def _fts_document_sql(self):
+        """ SQL expression building the weighted document of a row: the first
+            field gets weight A (titles), the others weight B. """
+        parts = []
+        for index, field_name in enumerate(self._fts_fields):
+            parts.append("setweight(to_tsvector('%s', coalesce(\"%s\", '')), '%s')" % (
+                self._fts_config, field_name, 'A' if index == 0 else 'B'))
+        return ' || '.join(parts)
+
+    @api.model_cr_context
+    def _auto_init(self):
+        res = super(FulltextMixinDt, self)._auto_init()
+        if self._abstract:
+            return res
+        cr = self._cr
+        if not column_exists(cr, self._table, 'fts_vector_dt'):
+            create_column(cr, self._table, 'fts_vector_dt', 'tsvector')
+            cr.execute('UPDATE "%s" SET fts_vector_dt = %s' % (self._table, self._fts_document_sql()))
+        index_name = '%s_fts_vector_dt_index' % self._table
+        if not index_exists(cr, index_name):
+            cr.execute('CREATE INDEX "%s" ON "%s" USING gin (fts_vector_dt)' % (index_name, self._table))
+        return res
+
+    def _fts_refresh(self):
+        """ Recompute the tsvector of the records in a single statement. """
+        if not self.ids:
+            return
+        self._cr.execute('UPDATE "%s" SET fts_vector_dt = %s WHERE id IN %%s' % (
+            self._table, self._fts_document_sql()), (tuple(self.ids),))
+
+    @api.model
+    def create(self, vals):
+        record = super(FulltextMixinDt, self).create(vals)
+        record._fts_refresh()
+        return record
+
+    @api.multi
+    def write(self, vals):
+        result = super(FulltextMixinDt, self).write(vals)
+        if any(field_name in vals for field_name in self._fts_fields):
+            self._fts_refresh()
+        return result
+
+    @api.model
+    def _fts_matching_sql(self, query):
+        """ ``(sql, params)`` of a query giving ``id, rank`` for every record
+            matching ``query``. Attachment text is merged in when enabled. """
+        sql = """
+            SELECT id, ts_rank(fts_vector_dt, query) AS rank
+              FROM "{table}", plainto_tsquery('{config}', %s) query
+             WHERE fts_vector_dt @@ query
+        """.format(table=self._table, config=self._fts_config)
+        params = [query]
+        if self.env['ir.attachment']._fts_dt_enabled():
+            sql = """
+                SELECT id, max(rank) AS rank FROM (
+                    {records}
+                    UNION ALL
+                    SELECT a.res_id, ts_rank(a.fts_vector_dt, query) * 0.5
+                      FROM ir_attachment a, plainto_tsquery('{config}', %s) query
+                     WHERE a.res_model = %s
+                       AND a.fts_vector_dt @@ query
+                ) matches GROUP BY id
+            """.format(records=sql, config=self._fts_config)
+            params += [query, self._name]
+        return sql, params
+
+    @api.model
+    def _fts_matching_ids(self, query, limit=None):
+        """ Return ``[(id, rank)]`` of the records matching ``query``,
+            best ranked first. """
+        if not query:
+            return []
+        sql, params = self._fts_matching_sql(query)
+        sql += ' ORDER BY rank DESC, id DESC'
+        if limit:
+            sql += ' LIMIT %s'
+            params.append(limit)
+        self._cr.execute(sql, params)
+        return self._cr.fetchall()
+
+    def _search_fts_query_dt(self, operator, value):
+        if operator in ('=', 'ilike', 'like'):
+            negative = False
+        elif operator in ('!=', 'not ilike', 'not like'):
+            negative = True
+        else:
+            raise UserError(_("Unsupported operator %s for the full-text search.") % operator)
+        if not value:
+            # like an empty ilike: everything matches, or nothing
+            return [(0, '=', 1)] if negative else []
+        sql, params = self._fts_matching_sql(value)
+        return [('id', 'not inselect' if negative else 'inselect', ('SELECT id FROM (%s) fts_matches' % sql, params))]
+
+    @api.model
+    def search_fulltext(self, query, domain=None, limit=80):
+        """ Ranked full-text search; the domain, the access rules, the
+            ordering and the limit are all applied in SQL.
+
+            :param query: plain text, words are combined with AND
+            :param domain: optional extra domain, access rules always apply
+            :return: list of dicts ``{'id', 'display_name', 'rank'}``
+        """
+        if not query:
+            return []
+        matches_sql, matches_params = self._fts_matching_sql(query)
+        where_query = self._where_calc(domain or [])
+        self._apply_ir_rules(where_query, 'read')
+        from_clause, where_clause, where_params = where_query.get_sql()
+        sql = """
+            SELECT "{table}".id, m.rank FROM ({matches}) m, {from_clause}
+             WHERE m.id = "{table}".id {where}
+          ORDER BY m.rank DESC, "{table}".id DESC
+        """.format(table=self._table, matches=matches_sql, from_clause=from_clause,
+                   where=where_clause and 'AND %s' % where_clause or '')
+        params = matches_params + where_params
+        if limit:
+            sql += ' LIMIT %s'
+            params.append(limit)
+        self._cr.execute(sql, params)
+        ranks = self._cr.fetchall()
+        records = self.browse([row[0] for row in ranks])
+        names = dict(records.name_get())
+        return [{'id': record_id, 'display_name': names.get(record_id), 'rank': rank} for record_id, rank in ranks]
+
+
+class ProjectDt(models.Model):
+    _name = 'project.dt'
+    _inherit = ['project.dt', 'fulltext.mixin.dt']
+
+
+class TaskDt(models.Model):
+    _name = 'task.dt'
+    _inherit = ['task.dt', 'fulltext.mixin.dt']
+
+
+class Attachment(models.Model):
+    _inherit = 'ir.attachment'
+
+    _fts_models_dt = ('project.dt', 'task.dt')
+
+    @api.model_cr_context
+    def _auto_init(self):
+        res = super(Attachment, self)._auto_init()
+        cr = self._cr
+        if not column_exists(cr, self._table, 'fts_vector_dt'):
+            create_column(cr, self._table, 'fts_vector_dt', 'tsvector')
+        if not index_exists(cr, 'ir_attachment_fts_vector_dt_index'):
+            cr.execute("""CREATE INDEX ir_attachment_fts_vector_dt_index ON ir_attachment
+                          USING gin (fts_vector_dt) WHERE fts_vector_dt IS NOT NULL""")
+        return res
+
+    @api.model
+    def _fts_dt_enabled(self):
+        return bool(self.env['ir.config_parameter'].sudo().get_param(FTS_ATTACHMENT_PARAM))
+
+    def _fts_dt_refresh(self):
+        """ Index the extracted text of typed project/task documents. """
+        if not self.ids or not self._fts_dt_enabled():
+            return
+        self._cr.execute("""
+            UPDATE ir_attachment
+               SET fts_vector_dt = setweight(to_tsvector('simple', coalesce(name, '')), 'A')
+                                || setweight(to_tsvector('simple', coalesce(index_content, '')), 'C')
+             WHERE id IN %s AND res_model IN %s AND doc_type IS NOT NULL
+        """, (tuple(self.ids), self._fts_models_dt))
+
+    @api.model
+    def _fts_dt_reindex(self):
+        """ Backfill the attachment index, e.g. after enabling the option. """
+        self.search([('res_model', 'in', self._fts_models_dt), ('doc_type', '!=', False)])._fts_dt_refresh()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        attachments = super(Attachment, self).create(vals_list)
+        attachments._fts_dt_refresh()
+        return attachments
+
+    @api.multi
+    def write(self, vals):
+        result = super(Attachment, self).write(vals)
+        if {'name', 'datas', 'index_content', 'doc_type', 'res_model'} & set(vals):
+            self._fts_dt_refresh()
+        return result
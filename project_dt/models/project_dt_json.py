@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import hashlib
+import logging
+import random
+import time
+
+import psycopg2
+from psycopg2 import errorcodes
+
+import odoo
+from odoo import api, fields, models
+from odoo.tools.sql import table_exists
+
+_logger = logging.getLogger(__name__)
+
+BUMP_MAX_TRIES = 5
+
+
+def _bump_tasks_versions_dt(dbname, project_ids):
+    """ Increment the task versions of the projects in a short transaction
+        of its own, in id order so concurrent bumps cannot deadlock. Bumps
+        of the same project by concurrent commits are serialized by
+        PostgreSQL: the loser is simply retried. """
+    project_ids = sorted(project_ids)
+    for tries in range(1, BUMP_MAX_TRIES + 1):
+        try:
+            with odoo.registry(dbname).cursor() as cr:
+                cr.execute("""
+                    INSERT INTO project_dt_tasks_version_dt (project_id, version)
+                    SELECT id, 1 FROM unnest(%s::integer[]) AS id ORDER BY id
+                    ON CONFLICT (project_id) DO UPDATE SET version = project_dt_tasks_version_dt.version + 1
+                """, (project_ids,))
+            return
+        except psycopg2.OperationalError as e:
+            if e.pgcode != errorcodes.SERIALIZATION_FAILURE or tries == BUMP_MAX_TRIES:
+                _logger.warning("Could not bump the task versions of projects %s: %s", project_ids, e)
+                return
+            time.sleep(random.uniform(0.0, 0.05 * 2 ** tries))
+        except Exception:
+            _logger.exception("Could not bump the task versions of projects %s", project_ids)
+            return
+
+
+class ProjectDt(models.Model):
+    _inherit = 'project.dt'
+
+    tasks_version_dt = fields.Integer('Tasks version', compute='_compute_tasks_version_dt',
+        help="Incremented each time a task of the project is created, modified or deleted.")
+
+    @api.model_cr
+    def init(self):
+        super(ProjectDt, self).init()
+        cr = self._cr
+        if not table_exists(cr, 'project_dt_tasks_version_dt'):
+            # a narrow table of its own: bumping a version never locks the project row
+            cr.execute("""
+                CREATE TABLE project_dt_tasks_version_dt (
+                    project_id integer PRIMARY KEY,
+                    version integer NOT NULL DEFAULT 0
+                )
+            """)
+
+    @api.multi
+    def _compute_tasks_version_dt(self):
+        versions = {}
+        if self.ids:
+            self._cr.execute("SELECT project_id, version FROM project_dt_tasks_version_dt WHERE project_id IN %s",
+                             (tuple(self.ids),))
+            versions = dict(self._cr.fetchall())
+        for project in self:
+            project.tasks_version_dt = versions.get(project.id, 0)
+
+    @api.multi
+    def _bump_tasks_version_dt(self):
+        """ Bump the versions once the transaction is committed, in a
+            transaction of its own: concurrent task writes of a project never
+            wait on each other for it, and a rollback bumps nothing. """
+        if not self.ids:
+            return
+        cr = self._cr
+        project_ids = getattr(cr, '_tasks_version_buffer_dt', None)
+        if project_ids is None:
+            project_ids = cr._tasks_version_buffer_dt = set()
+
+            def on_commit():
+                if getattr(cr, '_tasks_version_buffer_dt', None) is project_ids:
+                    del cr._tasks_version_buffer_dt
+                _bump_tasks_versions_dt(cr.dbname, project_ids)
+
+            def on_rollback():
+                if getattr(cr, '_tasks_version_buffer_dt', None) is project_ids:
+                    del cr._tasks_version_buffer_dt
+
+            cr.after('commit', on_commit)
+            cr.after('rollback', on_rollback)
+        project_ids.update(self.ids)
+
+    @api.multi
+    def _get_snapshot_etag_dt(self):
+        """ Version of the JSON snapshot, computed without reading task rows. """
+        self.ensure_one()
+        self._cr.execute("""
+            SELECT p.write_date, coalesce(v.version, 0),
+                   (SELECT max(write_date) FROM project_task_type_dt)
+              FROM project_dt p LEFT JOIN project_dt_tasks_version_dt v ON v.project_id = p.id
+             WHERE p.id = %s
+        """, (self.id,))
+        row = self._cr.fetchone()
+        key = '%s|%s|%s|%s|%s' % (row + (self.env.uid, self.env.lang))
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    @api.multi
+    def _get_snapshot_dt(self):
+        """ Compact representation of the project and its task tree.
+
+            Uses a fixed number of queries whatever the number of tasks:
+            the project, the visible task ids (record rules apply), the task
+            columns, the stages and the users.
+        """
+        self.ensure_one()
+        project = self.read(['name', 'approved_number', 'date_deadline', 'stage_id', 'user_id', 'partner_id'])[0]
+        task_ids = self.env['task.dt']._search([('project_id', '=', self.id)])
+        tasks = []
+        if task_ids:
+            self._cr.execute("""
+                SELECT id, parent_id, name, stage_id, stage_id_sub, user_id, reviewer_id, swap_id,
+                       planned_hours, progress2, kanban_state, priority, date_deadline
+                  FROM task_dt WHERE id IN %s
+              ORDER BY priority DESC, sequence, id DESC
+            """, (tuple(task_ids),))
+            tasks = self._cr.dictfetchall()
+
+        stage_ids = {self.stage_id.id} | {t['stage_id'] for t in tasks} | {t['stage_id_sub'] for t in tasks}
+        stage_ids.discard(None)
+        stage_ids.discard(False)
+        stages = self.env['project.task.type.dt'].browse(stage_ids).read(['name', 'sequence', 'fold', 'is_last_stage'])
+        stage_map = {stage['id']: stage for stage in stages}
+        user_ids = {t[key] for t in tasks for key in ('user_id', 'reviewer_id', 'swap_id') if t[key]}
+        users = dict(self.env['res.users'].browse(user_ids).sudo().name_get())
+
+        # rollups, same rules as the computed fields of task.dt and project.dt
+        children = {}
+        for task in tasks:
+            if task['parent_id']:
+                children.setdefault(task['parent_id'], []).append(task)
+        for task in tasks:
+            task['date_deadline'] = fields.Date.to_string(task['date_deadline'])
+            stage = stage_map.get(task['stage_id'])
+            subtasks = children.get(task['id'], [])
+            if task['parent_id']:
+                task['progress'] = 0.0
+            elif stage and stage['is_last_stage']:
+                task['progress'] = 100.0
+            else:
+                planned = sum(sub['planned_hours'] or 0.0 for sub in subtasks)
+                done = sum(sub['planned_hours'] or 0.0 for sub in subtasks if sub['progress2'] == 100.0)
+                task['progress'] = done * 100.0 / planned if planned and done else 0.0
+            task['subtask_count'] = len(subtasks)
+        counted = [t for t in tasks if not t['stage_id'] or not stage_map.get(t['stage_id'], {}).get('fold')]
+        planned = sum(t['planned_hours'] or 0.0 for t in counted)
+        effective = sum(t['planned_hours'] or 0.0 for t in counted if t['progress'] == 100.0)
+
+        project.update({
+            'date_deadline': fields.Date.to_string(project['date_deadline']),
+            'task_count': len(tasks),
+            'planned': planned,
+            'effective': effective,
+            'progress': effective * 100.0 / planned if planned else 0.0,
+            'tasks': [task for task in tasks if not task['parent_id']],
+            'subtasks': [task for task in tasks if task['parent_id']],
+            'stages': stages,
+            'users': users,
+        })
+        return project
+
+
+class TaskDt(models.Model):
+    _inherit = 'task.dt'
+
+    @api.model
+    def create(self, vals):
+        task = super(TaskDt, self).create(vals)
+        task.project_id._bump_tasks_version_dt()
+        return task
+
+    @api.multi
+    def write(self, vals):
+        projects = self.mapped('project_id')
+        result = super(TaskDt, self).write(vals)
+        (projects | self.mapped('project_id'))._bump_tasks_version_dt()
+        return result
+
+    @api.multi
+    def unlink(self):
+        self.mapped('project_id')._bump_tasks_version_dt()
+        return super(TaskDt, self).unlink()
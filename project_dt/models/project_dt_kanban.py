@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import api, fields, models, tools
+
+SUB_STAGE_FIELDS_DT = ('sequence', 'is_sub_task', 'is_project', 'is_last_stage')
+
+
+class ProjectTaskTypeDt(models.Model):
+    _inherit = 'project.task.type.dt'
+
+    @tools.ormcache()
+    def _sub_stages_dt(self):
+        """ ``((stage_id, is_last_stage), ...)`` of the sub-task stages, in
+            kanban order, shared by all users. """
+        stages = self.sudo().search([('is_sub_task', '=', True), ('is_project', '=', False)])
+        return tuple((stage.id, stage.is_last_stage) for stage in stages)
+
+    @api.model
+    def create(self, vals):
+        self.clear_caches()
+        return super(ProjectTaskTypeDt, self).create(vals)
+
+    @api.multi
+    def write(self, vals):
+        if any(field_name in vals for field_name in SUB_STAGE_FIELDS_DT):
+            self.clear_caches()
+        return super(ProjectTaskTypeDt, self).write(vals)
+
+    @api.multi
+    def unlink(self):
+        self.clear_caches()
+        return super(ProjectTaskTypeDt, self).unlink()
+
+
+class TaskDt(models.Model):
+    _inherit = 'task.dt'
+
+    stage_id_sub = fields.Many2one(group_expand='_read_group_stage_sub_ids')
+
+    @api.model
+    def _read_group_stage_sub_ids(self, stages, domain, order):
+        """ Every sub-task stage gets a column, from the cached stage list. """
+        ordered = stages.browse([stage_id for stage_id, dummy in self.env['project.task.type.dt']._sub_stages_dt()])
+        return ordered | stages
+
+    @api.model
+    def read_group(self, domain, fields, groupby, offset=0, limit=None, orderby=False, lazy=True):
+        """ Fold the last sub-task stages: the kanban then only shows their
+            count, and loads their records when the column is opened. """
+        result = super(TaskDt, self).read_group(domain, fields, groupby, offset=offset, limit=limit,
+                                                orderby=orderby, lazy=lazy)
+        groupby = [groupby] if isinstance(groupby, str) else list(groupby or [])
+        if lazy and groupby and groupby[0] == 'stage_id_sub':
+            last = {stage_id for stage_id, is_last in self.env['project.task.type.dt']._sub_stages_dt() if is_last}
+            for group in result:
+                if group.get('stage_id_sub') and group['stage_id_sub'][0] in last:
+                    group['__fold'] = True
+        return result
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import api, fields, models
+
+MEMBERSHIP_FIELDS_DT = ('members', 'favorite_user_ids', 'user_id')
+
+
+class ProjectDt(models.Model):
+    _inherit = 'project.dt'
+
+    membership_user_ids = fields.Many2many('res.users', 'project_dt_membership_rel_dt', 'project_id', 'user_id',
+        string='Involved users', readonly=True, copy=False,
+        help="Members, project manager and users having the project in favorites.")
+
+    @api.model_cr
+    def init(self):
+        super(ProjectDt, self).init()
+        self._cr.execute("SELECT 1 FROM project_dt_membership_rel_dt LIMIT 1")
+        if not self._cr.fetchone():
+            self._cr.execute("SELECT id FROM project_dt")
+            self.browse([row[0] for row in self._cr.fetchall()])._sync_membership_dt()
+
+    @api.multi
+    def _sync_membership_dt(self):
+        """ Rebuild the membership rows of the projects with two statements. """
+        if not self.ids:
+            return
+        params = {'ids': tuple(self.ids)}
+        self._cr.execute("DELETE FROM project_dt_membership_rel_dt WHERE project_id IN %(ids)s", params)
+        self._cr.execute("""
+            INSERT INTO project_dt_membership_rel_dt (project_id, user_id)
+            SELECT project_dt_id, uid FROM project_user_rel_dt WHERE project_dt_id IN %(ids)s
+             UNION
+            SELECT project_id, user_id FROM project_favorite_user_rel_dt WHERE project_id IN %(ids)s
+             UNION
+            SELECT id, user_id FROM project_dt WHERE id IN %(ids)s AND user_id IS NOT NULL
+        """, params)
+        self.invalidate_cache(['membership_user_ids'], self.ids)
+        self.env['res.users'].invalidate_cache(['project_dt_ids'])
+
+    @api.model
+    def _count_by_user_dt(self, user_ids):
+        """ ``{user_id: number of visible projects involving the user}`` in
+            one grouped query, record rules and active flag applied. """
+        if not user_ids:
+            return {}
+        query = self._where_calc([])
+        self._apply_ir_rules(query, 'read')
+        from_clause, where_clause, params = query.get_sql()
+        self._cr.execute("""
+            SELECT r.user_id, count(*) FROM project_dt_membership_rel_dt r
+             WHERE r.user_id IN %s
+               AND r.project_id IN (SELECT "project_dt".id FROM {from_clause} {where})
+          GROUP BY r.user_id
+        """.format(from_clause=from_clause, where=where_clause and 'WHERE %s' % where_clause or ''),
+            [tuple(user_ids)] + params)
+        return dict(self._cr.fetchall())
+
+    @api.model
+    def create(self, vals):
+        project = super(ProjectDt, self).create(vals)
+        project._sync_membership_dt()
+        return project
+
+    @api.multi
+    def write(self, vals):
+        result = super(ProjectDt, self).write(vals)
+        if any(field_name in vals for field_name in MEMBERSHIP_FIELDS_DT):
+            self._sync_membership_dt()
+        return result
+
+
+class Users(models.Model):
+    _inherit = 'res.users'
+
+    project_dt_ids = fields.Many2many('project.dt', 'project_dt_membership_rel_dt', 'user_id', 'project_id',
+        string='DT Projects', readonly=True, copy=False,
+        help="Design team projects where the user is a member or the manager, or that the user marked as favorite.")
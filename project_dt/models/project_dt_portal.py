@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import time
+
+from odoo import api, models, tools
+from odoo.osv import expression
+
+PORTAL_COUNT_TTL = 60
+
+
+def keyset_domain(records, record):
+    """ Domain selecting the rows that come strictly after ``record`` in the
+        ``_order`` of its model, so that a page is fetched with an index range
+        scan instead of an OFFSET. PostgreSQL puts NULL values last in
+        ascending order and first in descending order; the domain follows it.
+    """
+    terms = []
+    for term in records._order.split(','):
+        parts = term.split()
+        terms.append((parts[0], len(parts) > 1 and parts[1].lower() == 'desc'))
+    if terms[-1][0] != 'id':
+        terms.append(('id', False))
+
+    domain = expression.FALSE_DOMAIN
+    for field_name, desc in reversed(terms):
+        value = record[field_name]
+        if isinstance(value, models.BaseModel):
+            value = value.id
+        if value is False or value is None:
+            after = [(field_name, '!=', False)] if desc else expression.FALSE_DOMAIN
+            same = [(field_name, '=', False)]
+        elif desc:
+            after = [(field_name, '<', value)]
+            same = [(field_name, '=', value)]
+        else:
+            after = expression.OR([[(field_name, '>', value)], [(field_name, '=', False)]])
+            same = [(field_name, '=', value)]
+        domain = expression.OR([after, expression.AND([same, domain])])
+    return domain
+
+
+class PortalKeysetMixinDt(models.AbstractModel):
+    _name = 'portal.keyset.mixin.dt'
+    _description = 'Portal keyset pagination DT'
+
+    @api.model
+    def _portal_page_dt(self, domain, after=None, limit=20):
+        """ Return ``(records, next_after)`` for the page following the record
+            ``after`` (an id), ``next_after`` being False on the last page. """
+        if after:
+            # only a record of the listing can be a cursor, else first page
+            last = self.search(expression.AND([[('id', '=', after)], domain]), limit=1)
+            if last:
+                domain = expression.AND([domain, keyset_domain(self, last)])
+        records = self.search(domain, limit=limit + 1)
+        if len(records) > limit:
+            return records[:limit], records[limit - 1].id
+        return records, False
+
+    @api.model
+    def _portal_domain_dt(self):
+        return []
+
+    @api.model
+    def _portal_count_dt(self):
+        return self._portal_count_cached_dt(int(time.time() // PORTAL_COUNT_TTL))
+
+    @tools.ormcache('self.env.uid', 'bucket')
+    def _portal_count_cached_dt(self, bucket):
+        """ Counts shown on the portal home, cached per user for a minute. """
+        return self.search_count(self._portal_domain_dt())
+
+
+class ProjectDt(models.Model):
+    _name = 'project.dt'
+    _inherit = ['project.dt', 'portal.keyset.mixin.dt']
+
+    def _compute_access_url(self):
+        super(ProjectDt, self)._compute_access_url()
+        for project in self:
+            project.access_url = '/my/dt/project/%s' % project.id
+
+    @api.model
+    def _portal_domain_dt(self):
+        return [('privacy_visibility', '=', 'portal'), ('is_template_project', '=', False)]
+
+
+class TaskDt(models.Model):
+    _name = 'task.dt'
+    _inherit = ['task.dt', 'portal.keyset.mixin.dt']
+
+    def _compute_access_url(self):
+        super(TaskDt, self)._compute_access_url()
+        for task in self:
+            task.access_url = '/my/dt/task/%s' % task.id
+
+    @api.model
+    def _portal_domain_dt(self):
+        return [('project_id.privacy_visibility', '=', 'portal'), ('is_template_task', '=', False)]
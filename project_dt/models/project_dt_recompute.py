@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import logging
+import threading
+
+from odoo import api, fields, models, _
+from odoo.exceptions import AccessError
+
+_logger = logging.getLogger(__name__)
+
+RECOMPUTE_CHUNK_SIZE = 200
+
+
+class ProjectDt(models.Model):
+    _inherit = 'project.dt'
+
+    @api.multi
+    def _recompute_rollups_dt(self):
+        """ Rebuild every stored value derived from the projects and their
+            tasks: membership, full-text vectors, schedule, JSON snapshot
+            version and today's progress snapshot. Idempotent, so a chunk
+            can be run again after a failure. """
+        if not self.ids:
+            return
+        self._cr.execute("SELECT id FROM task_dt WHERE project_id IN %s", (tuple(self.ids),))
+        tasks = self.env['task.dt'].browse([row[0] for row in self._cr.fetchall()])
+        self._sync_membership_dt()
+        self._fts_refresh()
+        tasks._fts_refresh()
+        for project in self:
+            project._schedule_dt()
+        self._bump_tasks_version_dt()
+        self.env['project.dt.snapshot']._take_snapshot(project_ids=self.ids)
+
+    @api.model
+    def _recompute_chunks_dt(self, chunk_size=RECOMPUTE_CHUNK_SIZE, start_id=0):
+        """ Split the project ids from ``start_id`` on into ordered chunks. """
+        self._cr.execute("SELECT id FROM project_dt WHERE id >= %s ORDER BY id", (start_id or 0,))
+        ids = [row[0] for row in self._cr.fetchall()]
+        return [ids[index:index + chunk_size] for index in range(0, len(ids), chunk_size)]
+
+    @api.model
+    def _cron_recompute_rollups_dt(self):
+        """ Recompute all projects chunk by chunk in the cron worker,
+            committing after each chunk. The ``recomputedt`` command does
+            the same with several processes. """
+        auto_commit = not getattr(threading.currentThread(), 'testing', False)
+        chunks = self._recompute_chunks_dt()
+        for index, ids in enumerate(chunks, 1):
+            self.browse(ids)._recompute_rollups_dt()
+            if auto_commit:
+                self._cr.commit()
+            _logger.info("Recomputed project DT rollups: chunk %d/%d (ids %d-%d)", index, len(chunks), ids[0], ids[-1])
+        return True
+
+    @api.model
+    def action_recompute_rollups_dt(self):
+        """ Schedule a full recompute in the background. """
+        if not self.env.user.has_group('project.group_project_manager'):
+            raise AccessError(_("Only project managers can recompute the project rollups."))
+        cron = self.env.ref('project_dt.ir_cron_recompute_rollups_dt')
+        cron.sudo().write({'active': True, 'numbercall': 1, 'nextcall': fields.Datetime.now()})
+        return True
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from psycopg2.extras import execute_values
+
+from odoo import api, fields, models, _
+from odoo.exceptions import ValidationError
+
+SLACK_PRECISION = 1e-6
+
+
+def _closure(seeds, edges):
+    """ ``seeds`` and every node reachable from them through ``edges``. """
+    seen = set(seeds)
+    queue = deque(seeds)
+    while queue:
+        for node in edges.get(queue.popleft(), ()):
+            if node not in seen:
+                seen.add(node)
+                queue.append(node)
+    return seen
+
+
+def _topological(nodes, edges):
+    """ Kahn's algorithm restricted to ``nodes``, in O(V+E). """
+    indegree = dict.fromkeys(nodes, 0)
+    for node in nodes:
+        for succ in edges.get(node, ()):
+            if succ in indegree:
+                indegree[succ] += 1
+    queue = deque(node for node, degree in indegree.items() if not degree)
+    order = []
+    while queue:
+        node = queue.popleft()
+        order.append(node)
+        for succ in edges.get(node, ()):
+            if succ in indegree:
+                indegree[succ] -= 1
+                if not indegree[succ]:
+                    queue.append(succ)
+    if len(order) != len(indegree):
+        raise ValidationError(_("Task dependencies must not form a cycle."))
+    return order
+
+
+def schedule(durations, predecessors, previous=None, changed=None):
+    """ Critical path method over finish-to-start dependencies.
+
+        :param durations: ``{node: hours}``
+        :param predecessors: ``{node: [nodes it depends on]}``
+        :param previous: ``{node: (es, ef, ls, lf)}`` of the last run; with
+            ``changed`` only the impacted part of the graph is recomputed
+        :param changed: nodes whose duration or dependencies changed
+        :return: ``{node: (es, ef, ls, lf)}`` and the project finish
+    """
+    successors = defaultdict(list)
+    for node, preds in predecessors.items():
+        for pred in preds:
+            successors[pred].append(node)
+
+    incremental = previous is not None and changed is not None and all(node in previous for node in durations)
+    result = dict(previous) if incremental else {}
+    es, ef = {}, {}
+    for node, values in result.items():
+        es[node], ef[node] = values[0], values[1]
+
+    # forward pass: earliest dates only move downstream of a change
+    forward = _closure(changed, successors) & set(durations) if incremental else set(durations)
+    for node in _topological(forward, successors):
+        es[node] = max((ef[pred] for pred in predecessors.get(node, ())), default=0.0)
+        ef[node] = es[node] + (durations[node] or 0.0)
+    finish = max(ef.values(), default=0.0)
+
+    # backward pass: latest dates move upstream of a change, or everywhere
+    # when the project finish moved
+    old_finish = max((values[1] for values in result.values()), default=0.0)
+    if incremental and abs(finish - old_finish) < SLACK_PRECISION:
+        backward = _closure(changed, predecessors) & set(durations)
+    else:
+        backward = set(durations)
+    ls, lf = {}, {}
+    for node, values in result.items():
+        ls[node], lf[node] = values[2], values[3]
+    for node in reversed(_topological(backward, successors)):
+        lf[node] = min((ls[succ] for succ in successors.get(node, ())), default=finish)
+        ls[node] = lf[node] - (durations[node] or 0.0)
+
+    return {node: (es[node], ef[node], ls[node], lf[node]) for node in durations}, finish
+
+
+@contextmanager
+def deferred_schedule_dt(env):
+    """ Schedule each project touched by the task writes of the block once,
+        at the end of the block, instead of after every write. Nested blocks
+        are merged into the outermost one; nothing is scheduled when the
+        block raises. """
+    cr = env.cr
+    if getattr(cr, '_schedule_dt_pending', None) is not None:
+        yield
+        return
+    pending = cr._schedule_dt_pending = {}
+    try:
+        yield
+    finally:
+        del cr._schedule_dt_pending
+    for project in env['project.dt'].browse(list(pending)).exists():
+        project._schedule_dt(changed_task_ids=pending[project.id])
+
+
+class ProjectDt(models.Model):
+    _inherit = 'project.dt'
+
+    schedule_duration = fields.Float('Critical path (hours)', readonly=True, copy=False,
+        help="Length of the longest chain of dependent tasks, from their planned hours.")
+
+    @api.multi
+    def action_schedule_dt(self):
+        """ Full recompute of the schedule of the projects. """
+        for project in self:
+            project._schedule_dt()
+        return True
+
+    @api.model
+    def _schedule_all_dt(self):
+        """ Used at install time, when the schedule columns are still empty. """
+        self.with_context(active_test=False).search([]).action_schedule_dt()
+
+    @api.multi
+    @api.returns('self', lambda value: value.id)
+    def copy(self, default=None):
+        with deferred_schedule_dt(self.env):
+            return super(ProjectDt, self).copy(default)
+
+    @api.multi
+    def copy_tasks_from_template(self, default=None):
+        with deferred_schedule_dt(self.env):
+            return super(ProjectDt, self).copy_tasks_from_template(default)
+
+    @api.multi
+    def _schedule_later_dt(self, changed_task_ids=None):
+        """ ``_schedule_dt`` now, or at the end of the enclosing
+            ``deferred_schedule_dt`` block, merging the changed tasks. """
+        pending = getattr(self._cr, '_schedule_dt_pending', None)
+        for project in self:
+            if pending is None:
+                project._schedule_dt(changed_task_ids=changed_task_ids)
+            elif changed_task_ids is None or (project.id in pending and pending[project.id] is None):
+                pending[project.id] = None
+            else:
+                pending.setdefault(project.id, set()).update(changed_task_ids)
+
+    @api.multi
+    def _schedule_dt(self, changed_task_ids=None):
+        """ Load the dependency graph of the project in two queries, run the
+            scheduler and write back the rows that changed in one statement.
+        """
+        self.ensure_one()
+        cr = self._cr
+        cr.execute("""
+            SELECT id, planned_hours, early_start, early_finish, late_start, late_finish
+              FROM task_dt WHERE project_id = %s AND active
+        """, (self.id,))
+        rows = cr.fetchall()
+        durations = {row[0]: row[1] or 0.0 for row in rows}
+        previous = {row[0]: tuple(value or 0.0 for value in row[2:]) for row in rows}
+        cr.execute("""
+            SELECT r.task_id, r.depends_on_id FROM task_dependency_rel_dt r
+              JOIN task_dt t ON t.id = r.task_id
+             WHERE t.project_id = %s AND t.active
+        """, (self.id,))
+        predecessors = defaultdict(list)
+        for task_id, depends_on_id in cr.fetchall():
+            if depends_on_id in durations:
+                predecessors[task_id].append(depends_on_id)
+
+        changed = None
+        if changed_task_ids is not None:
+            changed = set(changed_task_ids) & set(durations)
+            # a task with hours always finishes after 0: when one is left at
+            # 0, the project was never scheduled and the pass must be full
+            if any(durations[task_id] and previous[task_id][1] < SLACK_PRECISION
+                   for task_id in durations if task_id not in changed):
+                changed = None
+        dates, finish = schedule(durations, predecessors, previous if changed is not None else None, changed)
+
+        values = [
+            (task_id,) + values + (values[2] - values[0], values[2] - values[0] < SLACK_PRECISION)
+            for task_id, values in dates.items()
+            if any(abs(a - b) >= SLACK_PRECISION for a, b in zip(values, previous[task_id]))
+            or changed is None
+        ]
+        if values:
+            execute_values(cr, """
+                UPDATE task_dt t
+                   SET early_start = v.es, early_finish = v.ef, late_start = v.ls, late_finish = v.lf,
+                       slack = v.slack, is_critical = v.critical
+                  FROM (VALUES %s) AS v(id, es, ef, ls, lf, slack, critical)
+                 WHERE t.id = v.id
+            """, values)
+            self.env['task.dt'].invalidate_cache(
+                ['early_start', 'early_finish', 'late_start', 'late_finish', 'slack', 'is_critical'],
+                [value[0] for value in values])
+        if abs((self.schedule_duration or 0.0) - finish) >= SLACK_PRECISION:
+            cr.execute("UPDATE project_dt SET schedule_duration = %s WHERE id = %s", (finish, self.id))
+            self.invalidate_cache(['schedule_duration'], self.ids)
+
+
+class TaskDt(models.Model):
+    _inherit = 'task.dt'
+
+    depend_on_ids = fields.Many2many('task.dt', 'task_dependency_rel_dt', 'task_id', 'depends_on_id',
+        string='Depends on', copy=False, domain="[('project_id', '=', project_id), ('id', '!=', id)]",
+        help="Finish-to-start: this task can only start when these tasks are finished.")
+    dependent_ids = fields.Many2many('task.dt', 'task_dependency_rel_dt', 'depends_on_id', 'task_id',
+        string='Blocks', copy=False)
+    early_start = fields.Float('Earliest start (h)', readonly=True, copy=False)
+    early_finish = fields.Float('Earliest finish (h)', readonly=True, copy=False)
+    late_start = fields.Float('Latest start (h)', readonly=True, copy=False)
+    late_finish = fields.Float('Latest finish (h)', readonly=True, copy=False)
+    slack = fields.Float('Slack (h)', readonly=True, copy=False)
+    is_critical = fields.Boolean('On critical path', readonly=True, copy=False, index=True)
+
+    @api.constrains('depend_on_ids', 'dependent_ids', 'project_id')
+    def _check_dependency_cycle(self):
+        for task in self:
+            if (task.depend_on_ids | task.dependent_ids).filtered(lambda other: other.project_id != task.project_id):
+                raise ValidationError(_("A task can only depend on tasks of its own project."))
+        self._cr.execute("""
+            WITH RECURSIVE upstream(id) AS (
+                SELECT depends_on_id FROM task_dependency_rel_dt WHERE task_id IN %(ids)s
+                UNION
+                SELECT r.depends_on_id FROM task_dependency_rel_dt r JOIN upstream u ON r.task_id = u.id
+            )
+            SELECT 1 FROM upstream WHERE id IN %(ids)s LIMIT 1
+        """, {'ids': tuple(self.ids)})
+        if self._cr.fetchone():
+            raise ValidationError(_("Task dependencies must not form a cycle."))
+
+    @api.model
+    def create(self, vals):
+        task = super(TaskDt, self).create(vals)
+        if task.project_id:
+            task.project_id._schedule_later_dt(changed_task_ids=(task | task.depend_on_ids | task.dependent_ids).ids)
+        return task
+
+    @api.multi
+    @api.returns('self', lambda value: value.id)
+    def copy(self, default=None):
+        # the subtasks are copied along
+        with deferred_schedule_dt(self.env):
+            return super(TaskDt, self).copy(default)
+
+    @api.model
+    def load(self, fields, data):
+        with deferred_schedule_dt(self.env):
+            return super(TaskDt, self).load(fields, data)
+
+    @api.multi
+    def write(self, vals):
+        if 'project_id' in vals or 'active' in vals:
+            projects = self.mapped('project_id')
+            result = super(TaskDt, self).write(vals)
+            (projects | self.mapped('project_id'))._schedule_later_dt()
+            return result
+        if not {'planned_hours', 'depend_on_ids', 'dependent_ids'} & set(vals):
+            return super(TaskDt, self).write(vals)
+        # old and new neighbours are impacted too
+        impacted = self | self.mapped('depend_on_ids') | self.mapped('dependent_ids')
+        result = super(TaskDt, self).write(vals)
+        impacted |= self.mapped('depend_on_ids') | self.mapped('dependent_ids')
+        for project in impacted.mapped('project_id'):
+            project._schedule_later_dt(changed_task_ids=impacted.filtered(lambda t: t.project_id == project).ids)
+        return result
+
+    @api.multi
+    def unlink(self):
+        projects = self.mapped('project_id')
+        result = super(TaskDt, self).unlink()
+        projects.exists()._schedule_later_dt()
+        return result
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import logging
+import threading
+from datetime import timedelta
+
+from odoo import api, fields, models, _
+from odoo.exceptions import AccessError
+from odoo.tools.sql import index_exists
+
+_logger = logging.getLogger(__name__)
+
+BACKFILL_CHUNK_SIZE = 50
+BACKFILL_CHUNK_DAYS = 31
+
+# One row per project and day: ``projects`` gives (day, project_id,
+# stage_id) and ``task`` (day, project_id, planned_hours, project_stage_id,
+# date_deadline, folded, closed, done) for the tasks of that day, with the
+# same meaning as the computed fields of project.dt.
+SNAPSHOT_INSERT = """
+    INSERT INTO project_dt_snapshot
+           (date, project_id, stage_id, planned, effective, remaining, progress,
+            cs_planned, cs_effective, cs_progress, open_task_count, overdue_task_count)
+    SELECT a.day, a.project_id, a.stage_id, a.planned, a.effective, a.planned - a.effective,
+           CASE WHEN a.planned != 0 THEN a.effective * 100.0 / a.planned ELSE 0.0 END,
+           a.cs_planned, a.cs_effective,
+           CASE WHEN a.cs_planned != 0 THEN a.cs_effective * 100.0 / a.cs_planned ELSE 0.0 END,
+           a.open_count, a.overdue_count
+      FROM (
+        SELECT p.day, p.project_id, p.stage_id,
+               coalesce(sum(t.planned_hours) FILTER (WHERE NOT t.folded), 0.0) AS planned,
+               coalesce(sum(t.planned_hours) FILTER (WHERE NOT t.folded AND t.done), 0.0) AS effective,
+               coalesce(sum(t.planned_hours) FILTER (WHERE t.project_stage_id = p.stage_id), 0.0) AS cs_planned,
+               coalesce(sum(t.planned_hours) FILTER (WHERE t.project_stage_id = p.stage_id AND t.done), 0.0) AS cs_effective,
+               count(t.project_id) FILTER (WHERE NOT t.closed) AS open_count,
+               count(t.project_id) FILTER (WHERE NOT t.closed AND t.date_deadline < p.day) AS overdue_count
+          FROM projects p
+     LEFT JOIN task t ON t.project_id = p.project_id AND t.day = p.day
+      GROUP BY p.day, p.project_id, p.stage_id
+      ) a
+    ON CONFLICT (project_id, date) DO {conflict}
+"""
+
+SNAPSHOT_UPDATE = """UPDATE SET
+    stage_id = EXCLUDED.stage_id, planned = EXCLUDED.planned, effective = EXCLUDED.effective,
+    remaining = EXCLUDED.remaining, progress = EXCLUDED.progress, cs_planned = EXCLUDED.cs_planned,
+    cs_effective = EXCLUDED.cs_effective, cs_progress = EXCLUDED.cs_progress,
+    open_task_count = EXCLUDED.open_task_count, overdue_task_count = EXCLUDED.overdue_task_count
+"""
+
+
+class ProjectDtSnapshot(models.Model):
+    """ Daily progress of the projects, for burndown and burnup charts.
+
+        Rows are only written by SQL, one set-based statement per day, and
+        are kept narrow: no log access columns, a unique (project, date) key
+        and a BRIN index on the date, since rows arrive in date order. The
+        table can be range-partitioned on ``date`` without changing the code.
+    """
+    _name = 'project.dt.snapshot'
+    _description = 'Project DT Daily Snapshot'
+    _order = 'date desc, project_id'
+    _log_access = False
+
+    date = fields.Date('Date', required=True, readonly=True)
+    project_id = fields.Many2one('project.dt', string='Project', required=True, readonly=True, ondelete='cascade')
+    stage_id = fields.Many2one('project.task.type.dt', string='Project stage', readonly=True, ondelete='set null')
+    planned = fields.Float('Planned', readonly=True)
+    effective = fields.Float('Effective', readonly=True)
+    remaining = fields.Float('Remaining', readonly=True)
+    progress = fields.Float('Progress', readonly=True, group_operator='avg')
+    cs_planned = fields.Float('Current stage Planned', readonly=True)
+    cs_effective = fields.Float('Current stage Effective', readonly=True)
+    cs_progress = fields.Float('Current stage Progress', readonly=True, group_operator='avg')
+    open_task_count = fields.Integer('Open tasks', readonly=True)
+    overdue_task_count = fields.Integer('Overdue tasks', readonly=True)
+
+    _sql_constraints = [
+        ('project_date_uniq', 'unique (project_id, date)', "Only one snapshot per project and day."),
+    ]
+
+    @api.model_cr
+    def init(self):
+        cr = self._cr
+        if not index_exists(cr, 'project_dt_snapshot_date_brin'):
+            cr.execute("CREATE INDEX project_dt_snapshot_date_brin ON project_dt_snapshot USING brin (date)")
+
+    @api.model
+    def _take_snapshot(self, date=None, project_ids=None):
+        """ Snapshot the active projects (all of them, or ``project_ids``)
+            at ``date`` from the current task data. Taking it again the same
+            day replaces the row. """
+        params = {'day': date or fields.Date.today(), 'ids': tuple(project_ids or ()) or (0,)}
+        self._cr.execute("""
+            WITH projects AS (
+                SELECT %(day)s::date AS day, p.id AS project_id, p.stage_id
+                  FROM project_dt p
+                 WHERE p.active AND p.is_template_project IS NOT TRUE
+                   AND ({all_projects} OR p.id IN %(ids)s)
+            ), child AS (
+                SELECT c.parent_id, sum(c.planned_hours) AS planned,
+                       sum(c.planned_hours) FILTER (WHERE c.progress2 = 100.0) AS done
+                  FROM task_dt c
+                 WHERE c.active AND c.parent_id IN (
+                        SELECT p.id FROM task_dt p WHERE p.project_id IN (SELECT project_id FROM projects))
+              GROUP BY c.parent_id
+            ), task AS (
+                SELECT %(day)s::date AS day, t.project_id, t.planned_hours, t.project_stage_id, t.date_deadline,
+                       coalesce(s.fold, FALSE) AS folded,
+                       coalesce(CASE WHEN t.parent_id IS NULL THEN s.is_last_stage ELSE ss.is_last_stage END, FALSE) AS closed,
+                       t.is_sub_task IS NOT TRUE
+                           AND (coalesce(s.is_last_stage, FALSE) OR (ch.planned > 0 AND ch.done >= ch.planned)) AS done
+                  FROM task_dt t
+             LEFT JOIN project_task_type_dt s ON s.id = t.stage_id
+             LEFT JOIN project_task_type_dt ss ON ss.id = t.stage_id_sub
+             LEFT JOIN child ch ON ch.parent_id = t.id
+                 WHERE t.active AND t.project_id IN (SELECT project_id FROM projects)
+            )
+        """.format(all_projects=project_ids is None and 'TRUE' or 'FALSE')
+            + SNAPSHOT_INSERT.format(conflict=SNAPSHOT_UPDATE), params)
+        self.invalidate_cache()
+
+    @api.model
+    def _backfill_snapshots(self, date_from=None, date_to=None, project_ids=None):
+        """ Rebuild the missing days from the task creation dates and the
+            stage transition log, for all projects or ``project_ids``.
+            Existing snapshots are kept. The history of the project stage and
+            of the sub-task progress is not recorded, so the current project
+            stage is used for the cs_* values and a task only counts as done
+            once it reached a last stage. """
+        cr = self._cr
+        params = {'ids': tuple(project_ids or ()) or (0,)}
+        all_projects = project_ids is None and 'TRUE' or 'FALSE'
+        if not date_from:
+            cr.execute("""SELECT min(create_date)::date FROM task_dt
+                          WHERE project_id IS NOT NULL AND ({} OR project_id IN %(ids)s)""".format(all_projects), params)
+            date_from = cr.fetchone()[0]
+        date_to = date_to or fields.Date.today() - timedelta(days=1)
+        if not date_from or date_from > date_to:
+            return
+        params.update(date_from=date_from, date_to=date_to)
+        cr.execute("""
+            WITH days AS (
+                SELECT d::date AS day FROM generate_series(%(date_from)s::date, %(date_to)s::date, interval '1 day') d
+            ), projects AS (
+                SELECT days.day, p.id AS project_id, p.stage_id
+                  FROM days JOIN project_dt p ON p.create_date::date <= days.day
+                 WHERE p.active AND p.is_template_project IS NOT TRUE
+                   AND ({all_projects} OR p.id IN %(ids)s)
+            ), history AS (
+                SELECT l.task_id, l.stage_field, l.to_stage_id, l.date::date AS date_from,
+                       lead(l.date::date) OVER (PARTITION BY l.task_id, l.stage_field ORDER BY l.date, l.id) AS date_to
+                  FROM task_stage_transition_dt l
+                 WHERE {all_projects} OR l.project_id IN %(ids)s
+            ), task AS (
+                SELECT days.day, t.project_id, t.planned_hours, t.project_stage_id, t.date_deadline,
+                       coalesce(s.fold, FALSE) AS folded,
+                       coalesce(CASE WHEN t.parent_id IS NULL THEN s.is_last_stage ELSE ss.is_last_stage END, FALSE) AS closed,
+                       t.is_sub_task IS NOT TRUE AND coalesce(s.is_last_stage, FALSE) AS done
+                  FROM days
+                  JOIN task_dt t ON t.create_date::date <= days.day
+             LEFT JOIN history h ON h.task_id = t.id AND h.stage_field = 'stage_id'
+                                AND h.date_from <= days.day AND (h.date_to IS NULL OR h.date_to > days.day)
+             LEFT JOIN history hs ON hs.task_id = t.id AND hs.stage_field = 'stage_id_sub'
+                                 AND hs.date_from <= days.day AND (hs.date_to IS NULL OR hs.date_to > days.day)
+             LEFT JOIN project_task_type_dt s ON s.id = h.to_stage_id
+             LEFT JOIN project_task_type_dt ss ON ss.id = hs.to_stage_id
+                 WHERE t.active AND t.project_id IS NOT NULL
+                   AND ({all_projects} OR t.project_id IN %(ids)s)
+            )
+        """.format(all_projects=all_projects) + SNAPSHOT_INSERT.format(conflict='NOTHING'), params)
+        _logger.info("Backfilled %d project DT snapshots from %s to %s", cr.rowcount, date_from, date_to)
+        self.invalidate_cache()
+
+    @api.model
+    def _cron_backfill_snapshots(self, chunk_size=BACKFILL_CHUNK_SIZE, chunk_days=BACKFILL_CHUNK_DAYS):
+        """ Backfill the history of every project, by chunks of projects
+            and of days, committing after each one. Interrupted runs resume
+            where they stopped, the days already done being kept. """
+        auto_commit = not getattr(threading.currentThread(), 'testing', False)
+        cr = self._cr
+        cr.execute("SELECT id FROM project_dt WHERE active AND is_template_project IS NOT TRUE ORDER BY id")
+        ids = [row[0] for row in cr.fetchall()]
+        date_to = fields.Date.today() - timedelta(days=1)
+        for index in range(0, len(ids), chunk_size):
+            project_ids = ids[index:index + chunk_size]
+            cr.execute("SELECT min(create_date)::date FROM task_dt WHERE project_id IN %s", (tuple(project_ids),))
+            day = cr.fetchone()[0]
+            while day and day <= date_to:
+                end = min(day + timedelta(days=chunk_days - 1), date_to)
+                self._backfill_snapshots(day, end, project_ids)
+                if auto_commit:
+                    cr.commit()
+                day = end + timedelta(days=1)
+            _logger.info("Backfilled project DT snapshots: projects %d-%d", project_ids[0], project_ids[-1])
+        return True
+
+    @api.model
+    def action_backfill_snapshots_dt(self):
+        """ Schedule the backfill of the snapshot history in the background. """
+        if not self.env.user.has_group('project.group_project_manager'):
+            raise AccessError(_("Only project managers can backfill the project snapshots."))
+        cron = self.env.ref('project_dt.ir_cron_backfill_snapshots_dt')
+        cron.sudo().write({'active': True, 'numbercall': 1, 'nextcall': fields.Datetime.now()})
+        return True
+
+    @api.model
+    def _cron_take_snapshot(self):
+        self._take_snapshot()
+        return True
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import api, models, tools
+from odoo.tools.sql import index_exists
+
+
+class TagsDt(models.Model):
+    _inherit = 'tags.dt'
+
+    @api.model_cr
+    def init(self):
+        # the unique (task_dt_id, tags_dt_id) index serves task -> tags,
+        # this one serves tag -> tasks as an index-only scan
+        if not index_exists(self._cr, 'task_tags_rel_dt_tag_task_index'):
+            self._cr.execute("""CREATE INDEX task_tags_rel_dt_tag_task_index
+                                ON task_tags_rel_dt (tags_dt_id, task_dt_id)""")
+
+    @api.model
+    def _name_search(self, name='', args=None, operator='ilike', limit=100, name_get_uid=None):
+        if args or name_get_uid or operator not in ('ilike', '=ilike', '='):
+            return super(TagsDt, self)._name_search(name, args=args, operator=operator, limit=limit,
+                                                    name_get_uid=name_get_uid)
+        name = name or ''
+        if operator != '=':
+            # case-insensitive operators: one cache entry whatever the case
+            name = name.strip().lower()
+        return list(self._autocomplete_dt(name, operator, limit, self._autocomplete_version_dt()))
+
+    @api.model
+    def _autocomplete_version_dt(self):
+        """ Changes whenever a tag is created, renamed or deleted, on any
+            worker, so stale autocomplete entries are never hit and no
+            registry-wide cache invalidation is needed. """
+        self._cr.execute("SELECT count(*), max(write_date) FROM tags_dt")
+        return self._cr.fetchone()
+
+    @tools.ormcache('name', 'operator', 'limit', 'version')
+    def _autocomplete_dt(self, name, operator, limit, version):
+        """ Tag autocomplete, shared by all users: tags have no record rule. """
+        tags = self.sudo().search([('name', operator, name)] if name else [], limit=limit, order='name')
+        return tuple(tags.name_get())
+
+
+class TaskDt(models.Model):
+    _inherit = 'task.dt'
+
+    @api.model
+    def _tags_all_domain_dt(self, tag_ids):
+        """ Tasks having every tag of ``tag_ids``, as a subquery. """
+        if not tag_ids:
+            return []
+        return [('id', 'inselect', ("""
+            SELECT task_dt_id FROM task_tags_rel_dt
+             WHERE tags_dt_id IN %s
+          GROUP BY task_dt_id
+            HAVING count(*) = %s
+        """, [tuple(tag_ids), len(set(tag_ids))]))]
+
+    @api.model
+    def read_tag_facets_dt(self, domain=None, tag_ids=None, limit=50):
+        """ Tag facets of the tasks matching ``domain`` and having all the
+            tags ``tag_ids``, with one grouped query.
+
+            :return: list of dicts ``{'id', 'name', 'color', 'count'}``,
+                most used tags first
+        """
+        self.check_access_rights('read')
+        domain = list(domain or []) + self._tags_all_domain_dt(tag_ids)
+        query = self._where_calc(domain)
+        self._apply_ir_rules(query, 'read')
+        from_clause, where_clause, params = query.get_sql()
+        self._cr.execute("""
+            SELECT tag.id, tag.name, tag.color, count(*) AS task_count
+              FROM task_tags_rel_dt rel
+              JOIN tags_dt tag ON tag.id = rel.tags_dt_id
+             WHERE rel.task_dt_id IN (SELECT "task_dt".id FROM {from_clause} {where})
+          GROUP BY tag.id, tag.name, tag.color
+          ORDER BY task_count DESC, tag.name
+             LIMIT %s
+        """.format(from_clause=from_clause, where=where_clause and 'WHERE %s' % where_clause or ''),
+            params + [limit])
+        return [{'id': tag_id, 'name': name, 'color': color, 'count': count}
+                for tag_id, name, color, count in self._cr.fetchall()]
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from psycopg2.extras import execute_values
+
+from odoo import api, fields, models, tools
+from odoo.tools.sql import index_exists
+
+STAGE_FIELDS_DT = ('stage_id', 'stage_id_sub')
+
+
+class TaskStageTransitionDt(models.Model):
+    """ Append-only log of the stage changes of tasks.
+
+        Rows are only inserted, in bulk, from ``task.dt`` create/write. Each
+        row also stores when the previous stage was entered and how long the
+        task stayed there, so time-in-stage is a plain aggregate.
+    """
+    _name = 'task.stage.transition.dt'
+    _description = 'Task Stage Transition DT'
+    _order = 'date desc, id desc'
+    _log_access = False
+
+    task_id = fields.Many2one('task.dt', string='Task', required=True, readonly=True, ondelete='cascade')
+    project_id = fields.Many2one('project.dt', string='Project', readonly=True, index=True, ondelete='cascade')
+    stage_field = fields.Selection([
+        ('stage_id', 'Task stage'),
+        ('stage_id_sub', 'Sub-task stage'),
+    ], string='Stage type', required=True, readonly=True)
+    from_stage_id = fields.Many2one('project.task.type.dt', string='From stage', readonly=True, ondelete='set null')
+    to_stage_id = fields.Many2one('project.task.type.dt', string='To stage', readonly=True, ondelete='set null')
+    user_id = fields.Many2one('res.users', string='User', readonly=True, ondelete='set null')
+    from_date = fields.Datetime('Stage entered', readonly=True)
+    date = fields.Datetime('Date', required=True, readonly=True)
+    duration = fields.Float('Hours in stage', readonly=True, group_operator='avg',
+        help="Hours spent in the 'From stage' before this transition.")
+
+    @api.model_cr
+    def init(self):
+        cr = self._cr
+        if not index_exists(cr, 'task_stage_transition_dt_task_date_index'):
+            cr.execute("""CREATE INDEX task_stage_transition_dt_task_date_index
+                          ON task_stage_transition_dt (task_id, stage_field, date DESC)""")
+        if not index_exists(cr, 'task_stage_transition_dt_project_stage_index'):
+            cr.execute("""CREATE INDEX task_stage_transition_dt_project_stage_index
+                          ON task_stage_transition_dt (project_id, from_stage_id)""")
+        # backfill: the current stage of the tasks that have no history yet
+        for stage_field in STAGE_FIELDS_DT:
+            cr.execute("""
+                INSERT INTO task_stage_transition_dt
+                       (task_id, project_id, stage_field, to_stage_id, user_id, from_date, date, duration)
+                SELECT t.id, t.project_id, %(field)s, t.{field}, t.write_uid,
+                       t.create_date, coalesce(t.date_last_stage_update, t.create_date), 0.0
+                  FROM task_dt t
+                 WHERE t.{field} IS NOT NULL
+                   AND NOT EXISTS (SELECT 1 FROM task_stage_transition_dt l
+                                    WHERE l.task_id = t.id AND l.stage_field = %(field)s)
+            """.format(field=stage_field), {'field': stage_field})
+
+    @api.model
+    def _log_transitions(self, task_ids, before, stage_fields):
+        """ Insert one row per task and stage field whose value changed.
+
+            :param task_ids: ids of the written tasks
+            :param before: ``{task_id: {stage_field: stage_id}}`` before write,
+                empty for created tasks
+            :param stage_fields: the stage fields that were written
+        """
+        cr = self._cr
+        cr.execute("SELECT id, project_id, stage_id, stage_id_sub FROM task_dt WHERE id IN %s", (tuple(task_ids),))
+        after = {row[0]: row for row in cr.fetchall()}
+        cr.execute("""
+            SELECT DISTINCT ON (task_id, stage_field) task_id, stage_field, date
+              FROM task_stage_transition_dt
+             WHERE task_id IN %s AND stage_field IN %s
+          ORDER BY task_id, stage_field, date DESC
+        """, (tuple(task_ids), tuple(stage_fields)))
+        entered = {(task_id, field): date for task_id, field, date in cr.fetchall()}
+        cr.execute("SELECT now() at time zone 'UTC'")
+        now = cr.fetchone()[0]
+
+        rows = []
+        for task_id, project_id, stage_id, stage_id_sub in after.values():
+            new_values = {'stage_id': stage_id, 'stage_id_sub': stage_id_sub}
+            for field in stage_fields:
+                old = before.get(task_id, {}).get(field)
+                new = new_values[field]
+                if old == new:
+                    continue
+                from_date = entered.get((task_id, field))
+                duration = (now - from_date).total_seconds() / 3600.0 if from_date else 0.0
+                rows.append((task_id, project_id, field, old, new, self.env.uid, from_date or now, now, duration))
+        if rows:
+            execute_values(cr, """
+                INSERT INTO task_stage_transition_dt
+                       (task_id, project_id, stage_field, from_stage_id, to_stage_id, user_id, from_date, date, duration)
+                VALUES %s
+            """, rows)
+
+
+class TaskCycleReportDt(models.Model):
+    """ Lead time (creation to last stage) and cycle time (first move out of
+        the initial stage to last stage) of each task, from the transitions.
+
+        Rows are grouped by project too, so a project filter is applied to
+        the transitions, through their project index, before aggregating. """
+    _name = 'report.task.cycle.dt'
+    _description = 'Task Lead and Cycle Time DT'
+    _auto = False
+    _order = 'date_done desc'
+
+    task_id = fields.Many2one('task.dt', string='Task', readonly=True)
+    project_id = fields.Many2one('project.dt', string='Project', readonly=True)
+    stage_field = fields.Selection([
+        ('stage_id', 'Task stage'),
+        ('stage_id_sub', 'Sub-task stage'),
+    ], string='Stage type', readonly=True)
+    date_created = fields.Datetime('Created', readonly=True)
+    date_started = fields.Datetime('Started', readonly=True)
+    date_done = fields.Datetime('Done', readonly=True)
+    transition_count = fields.Integer('Transitions', readonly=True)
+    lead_time = fields.Float('Lead time (hours)', readonly=True, group_operator='avg')
+    cycle_time = fields.Float('Cycle time (hours)', readonly=True, group_operator='avg')
+
+    @api.model_cr
+    def init(self):
+        tools.drop_view_if_exists(self._cr, self._table)
+        self._cr.execute("""
+            CREATE VIEW report_task_cycle_dt AS (
+                SELECT min(l.id) AS id,
+                       l.task_id,
+                       l.project_id,
+                       l.stage_field,
+                       min(l.from_date) AS date_created,
+                       min(l.date) FILTER (WHERE l.from_stage_id IS NOT NULL) AS date_started,
+                       max(l.date) FILTER (WHERE s.is_last_stage) AS date_done,
+                       count(*) AS transition_count,
+                       extract(epoch FROM max(l.date) FILTER (WHERE s.is_last_stage) - min(l.from_date)) / 3600.0 AS lead_time,
+                       extract(epoch FROM max(l.date) FILTER (WHERE s.is_last_stage)
+                                        - min(l.date) FILTER (WHERE l.from_stage_id IS NOT NULL)) / 3600.0 AS cycle_time
+                  FROM task_stage_transition_dt l
+             LEFT JOIN project_task_type_dt s ON s.id = l.to_stage_id
+              GROUP BY l.project_id, l.task_id, l.stage_field
+            )
+        """)
+
+
+class TaskDt(models.Model):
+    _inherit = 'task.dt'
+
+    @api.model
+    def create(self, vals):
+        task = super(TaskDt, self).create(vals)
+        stage_fields = [field for field in STAGE_FIELDS_DT if task[field]]
+        if stage_fields:
+            self.env['task.stage.transition.dt']._log_transitions(task.ids, {}, stage_fields)
+        return task
+
+    @api.multi
+    def write(self, vals):
+        stage_fields = [field for field in STAGE_FIELDS_DT if field in vals]
+        if not stage_fields or not self.ids:
+            return super(TaskDt, self).write(vals)
+        self._cr.execute("SELECT id, stage_id, stage_id_sub FROM task_dt WHERE id IN %s", (tuple(self.ids),))
+        before = {task_id: {'stage_id': stage_id, 'stage_id_sub': stage_id_sub}
+                  for task_id, stage_id, stage_id_sub in self._cr.fetchall()}
+        result = super(TaskDt, self).write(vals)
+        self.env['task.stage.transition.dt']._log_transitions(self.ids, before, stage_fields)
+        return result
@@ -0,0 +1,188 @@
+odoo.define('project_dt.LiveKanbanView', function (require) {
+"use strict";
+
+/**
+ * Kanban view refreshing its cards from the change events published by
+ * project_dt on the bus, instead of reloading the whole view.
+ *
+ * The events only carry record ids (and the project of the tasks), so the
+ * changed records are read back with the access rights of the user, in one
+ * search_read per batch of events restricted to the domain of the view.
+ * Cards staying in their column are reloaded in place; cards moving between
+ * columns, appearing or disappearing only reload the columns involved.
+ */
+
+var KanbanController = require('web.KanbanController');
+var KanbanView = require('web.KanbanView');
+var viewRegistry = require('web.view_registry');
+
+var MESSAGE_TYPE = 'project_dt.kanban';
+var CHANNEL = 'project_dt.kanban';
+
+var LiveKanbanController = KanbanController.extend({
+    start: function () {
+        this.call('bus_service', 'onNotification', this, this._onLiveNotification);
+        this.call('bus_service', 'startPolling');
+        return this._super.apply(this, arguments);
+    },
+
+    //--------------------------------------------------------------------------
+    // Private
+    //--------------------------------------------------------------------------
+
+    /**
+     * @private
+     * @returns {Object[]} the groups of the view, or the view itself
+     */
+    _liveGroups: function () {
+        var state = this.model.get(this.handle);
+        return state.groupedBy.length ? state.data : [state];
+    },
+    /**
+     * @private
+     * @param {integer} resID
+     * @returns {Object|undefined} ``{group, record}`` showing ``resID``
+     */
+    _liveFind: function (resID) {
+        var groups = this._liveGroups();
+        for (var i = 0; i < groups.length; i++) {
+            var record = _.findWhere(groups[i].data, {res_id: resID});
+            if (record) {
+                return {group: groups[i], record: record};
+            }
+        }
+    },
+    /**
+     * @private
+     * @returns {Object} the ids of the projects shown, as keys
+     */
+    _liveProjects: function () {
+        var state = this.model.get(this.handle);
+        var projectIDs = {};
+        if (state.context.default_project_id) {
+            projectIDs[state.context.default_project_id] = true;
+        }
+        _.each(this._liveGroups(), function (group) {
+            _.each(group.data, function (record) {
+                if (record.data.project_id) {
+                    projectIDs[record.data.project_id.res_id] = true;
+                }
+            });
+        });
+        return projectIDs;
+    },
+    /**
+     * Read the changed records back and refresh the cards and columns
+     * they leave or enter.
+     *
+     * @private
+     * @param {Object[]} records ``{id, [project_id], [removed]}``
+     */
+    _liveRefresh: function (records) {
+        var self = this;
+        var state = this.model.get(this.handle);
+        var groupField = state.groupedBy.length && state.groupedBy[0].split(':')[0];
+        var ids = _.uniq(_.pluck(records, 'id'));
+        return this._rpc({
+            model: this.modelName,
+            method: 'search_read',
+            domain: state.domain.concat([['id', 'in', ids]]),
+            fields: groupField ? [groupField] : ['id'],
+            context: state.getContext(),
+        }).then(function (result) {
+            var values = _.indexBy(result, 'id');
+            var groupIDs = [];
+            var reloadAll = false;
+            _.each(ids, function (resID) {
+                var found = self._liveFind(resID);
+                var value = values[resID];
+                var target;
+                if (value && groupField) {
+                    var groupValue = _.isArray(value[groupField]) ? value[groupField][0] : value[groupField];
+                    target = _.findWhere(self._liveGroups(), {res_id: groupValue});
+                }
+                if (!found) {
+                    // a new card, or one entering a column on screen
+                    if (target) {
+                        groupIDs.push(target.id);
+                    } else if (value && !groupField) {
+                        reloadAll = true;
+                    }
+                } else if (!value || (groupField && (!target || target.id !== found.group.id))) {
+                    groupIDs.push(found.group.id);
+                    if (target) {
+                        groupIDs.push(target.id);
+                    }
+                } else {
+                    self.model.reload(found.record.id).then(function (id) {
+                        self.renderer.updateRecord(self.model.get(id));
+                    });
+                }
+            });
+            if (reloadAll) {
+                self.reload();
+            } else {
+                self._liveReload(groupIDs);
+            }
+        });
+    },
+    /**
+     * Reload the given columns only.
+     *
+     * @private
+     * @param {string[]} groupIDs
+     */
+    _liveReload: function (groupIDs) {
+        var self = this;
+        _.each(_.uniq(groupIDs), function (groupID) {
+            self.model.reload(groupID).then(function (id) {
+                self.renderer.updateColumn(id, self.model.get(id));
+            });
+        });
+    },
+
+    //--------------------------------------------------------------------------
+    // Handlers
+    //--------------------------------------------------------------------------
+
+    /**
+     * @private
+     * @param {Array[]} notifications ``[channel, message]`` pairs
+     */
+    _onLiveNotification: function (notifications) {
+        var self = this;
+        var projectIDs = this.modelName === 'task.dt' && this._liveProjects();
+        var records = [];
+        _.each(notifications, function (notification) {
+            var channel = notification[0];
+            var message = notification[1];
+            if (!_.isArray(channel) || channel[1] !== CHANNEL || !message ||
+                    message.type !== MESSAGE_TYPE || message.model !== self.modelName) {
+                return;
+            }
+            _.each(message.records, function (values) {
+                if (!projectIDs || projectIDs[values.project_id]) {
+                    records.push(values);
+                }
+            });
+        });
+        if (records.length) {
+            this._liveRefresh(records);
+        }
+    },
+});
+
+var LiveKanbanView = KanbanView.extend({
+    config: _.extend({}, KanbanView.prototype.config, {
+        Controller: LiveKanbanController,
+    }),
+});
+
+viewRegistry.add('project_dt_live_kanban', LiveKanbanView);
+
+return {
+    LiveKanbanController: LiveKanbanController,
+    LiveKanbanView: LiveKanbanView,
+};
+
+});
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import random
+
+from odoo.tests.common import TransactionCase
+
+from odoo.addons.project_dt.models.project_dt_schedule import deferred_schedule_dt, schedule
+
+DATE_FIELDS = ('early_start', 'early_finish', 'late_start', 'late_finish', 'slack', 'is_critical')
+
+
+class TestScheduleDt(TransactionCase):
+
+    def setUp(self):
+        super(TestScheduleDt, self).setUp()
+        self.project = self.env['project.dt'].create({'name': 'Schedule DT'})
+
+    def _task(self, name, hours, depends=()):
+        return self.env['task.dt'].create({
+            'name': name,
+            'project_id': self.project.id,
+            'planned_hours': hours,
+            'depend_on_ids': [(6, 0, [task.id for task in depends])],
+        })
+
+    def _dates(self, tasks):
+        tasks.invalidate_cache(DATE_FIELDS)
+        self.project.invalidate_cache(['schedule_duration'])
+        return self.project.schedule_duration, {task.id: tuple(task[name] for name in DATE_FIELDS) for task in tasks}
+
+    def _assert_full_schedule(self, tasks):
+        """ The stored schedule is the one a full pass gives. """
+        incremental = self._dates(tasks)
+        self.project.action_schedule_dt()
+        full = self._dates(tasks)
+        self.assertAlmostEqual(incremental[0], full[0])
+        for task in tasks:
+            for name, value, expected in zip(DATE_FIELDS, incremental[1][task.id], full[1][task.id]):
+                self.assertAlmostEqual(value, expected, msg="%s of %s" % (name, task.name))
+
+    def test_incremental_matches_full(self):
+        a = self._task('A', 8.0)
+        b = self._task('B', 3.0, [a])
+        c = self._task('C', 2.0, [a])
+        d = self._task('D', 4.0, [b, c])
+        tasks = a | b | c | d
+        self._assert_full_schedule(tasks)
+        self.assertAlmostEqual(self.project.schedule_duration, 15.0)
+
+        b.write({'planned_hours': 5.0})
+        self._assert_full_schedule(tasks)
+        self.assertAlmostEqual(self.project.schedule_duration, 17.0)
+
+        c.write({'depend_on_ids': [(5,)], 'planned_hours': 20.0})
+        self._assert_full_schedule(tasks)
+        a.write({'dependent_ids': [(3, b.id)]})
+        self._assert_full_schedule(tasks)
+        d.unlink()
+        self._assert_full_schedule(tasks - d)
+
+    def test_unscheduled_project(self):
+        """ Columns never filled (e.g. right after an upgrade) give a full
+            pass, not an incremental one over zeros. """
+        a = self._task('A', 8.0)
+        b = self._task('B', 8.0, [a])
+        self.env.cr.execute("""UPDATE task_dt SET early_start = 0, early_finish = 0, late_start = 0, late_finish = 0
+                               WHERE id IN %s""", (tuple((a | b).ids),))
+        b.write({'planned_hours': 5.0})
+        self._assert_full_schedule(a | b)
+        self.assertAlmostEqual(self.project.schedule_duration, 13.0)
+        self.assertAlmostEqual(a.late_start, 0.0)
+
+    def test_deferred(self):
+        with deferred_schedule_dt(self.env):
+            a = self._task('A', 8.0)
+            b = self._task('B', 3.0, [a])
+            c = self._task('C', 2.0, [b])
+            # nothing scheduled yet
+            self.assertAlmostEqual(self._dates(a | b | c)[1][c.id][1], 0.0)
+        self._assert_full_schedule(a | b | c)
+        self.assertAlmostEqual(self.project.schedule_duration, 13.0)
+
+    def test_schedule_random_graphs(self):
+        rnd = random.Random(42)
+        for dummy in range(200):
+            nodes = list(range(rnd.randint(1, 12)))
+            durations = {node: rnd.choice([0.0, 1.0, 2.0, 5.0, 8.0]) for node in nodes}
+            predecessors = {node: [pred for pred in range(node) if rnd.random() < 0.3] for node in nodes}
+            previous, dummy_finish = schedule(durations, predecessors)
+            node = rnd.choice(nodes)
+            changed = {node} | set(predecessors[node]) | {succ for succ in nodes if node in predecessors[succ]}
+            durations[node] = rnd.choice([0.0, 3.0, 13.0])
+            incremental = schedule(durations, predecessors, previous, changed)
+            self.assertEqual(incremental, schedule(durations, predecessors))
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+""" Concurrent multi-user load test for the project_dt workflows.
+
+Starts (optionally) a local Odoo server on a fresh database with project_dt
+installed, generates a dataset over RPC, then lets many simulated designers
+hammer the server at the same time with a realistic mix of operations:
+open the dashboard, open a project, move task stages, close and reopen tasks,
+create subtasks. Reports p50/p95/p99 latency, throughput, errors, and the
+serialization failures and client retries per operation.
+
+Example::
+
+    tools/project_dt_loadtest.py --odoo-bin ./odoo-bin --addons-path addons,../project_dt \\
+        --db loadtest_dt --projects 50 --tasks 40 --users 40 --duration 120
+
+Only the standard library is used, so it runs from any Python 3 environment.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+import xmlrpc.client
+from collections import defaultdict
+
+SERIALIZATION_MARKERS = (
+    'could not serialize access',
+    'concurrent update',
+    'deadlock detected',
+    'TransactionRollbackError',
+    'lock not available',
+)
+
+# odoo.service.model retries concurrency failures itself and logs it at INFO
+SERVER_RETRY_RE = re.compile(r'odoo\.service\.model: .*, retry \d+/\d+ in ')
+SERVER_GAVE_UP_RE = re.compile(r'odoo\.service\.model: .*, maximum number of tries reached')
+
+# weight of each operation in the mix
+OPERATIONS = {
+    'open_dashboard': 20,
+    'open_project': 25,
+    'move_stage': 25,
+    'close_task': 10,
+    'reopen_task': 10,
+    'create_subtask': 10,
+}
+
+
+class RpcClient(object):
+    """ Minimal ``execute_kw`` client; one instance per thread. """
+
+    def __init__(self, url, db, login, password, protocol='xmlrpc'):
+        self.url = url.rstrip('/')
+        self.db = db
+        self.password = password
+        self.protocol = protocol
+        self._ids = itertools.count()
+        if protocol == 'xmlrpc':
+            common = xmlrpc.client.ServerProxy('%s/xmlrpc/2/common' % self.url, allow_none=True)
+            self.uid = common.authenticate(db, login, password, {})
+            self._object = xmlrpc.client.ServerProxy('%s/xmlrpc/2/object' % self.url, allow_none=True)
+        else:
+            self.uid = self._jsonrpc('common', 'authenticate', [db, login, password, {}])
+        if not self.uid:
+            raise RuntimeError('Authentication failed for %s' % login)
+
+    def _jsonrpc(self, service, method, args):
+        payload = json.dumps({
+            'jsonrpc': '2.0', 'method': 'call', 'id': next(self._ids),
+            'params': {'service': service, 'method': method, 'args': args},
+        }).encode('utf-8')
+        request = urllib.request.Request('%s/jsonrpc' % self.url, payload, {'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=300) as response:
+            reply = json.loads(response.read().decode('utf-8'))
+        if reply.get('error'):
+            error = reply['error']
+            raise RuntimeError('%s: %s' % (error.get('message'), error.get('data', {}).get('message', '')))
+        return reply['result']
+
+    def call(self, model, method, *args, **kwargs):
+        params = [self.db, self.uid, self.password, model, method, list(args), kwargs]
+        if self.protocol == 'xmlrpc':
+            return self._object.execute_kw(*params)
+        return self._jsonrpc('object', 'execute_kw', params)
+
+
+def is_serialization_failure(error):
+    message = str(getattr(error, 'faultString', '')) or str(error)
+    return any(marker in message for marker in SERIALIZATION_MARKERS)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[max(0, int(math.ceil(pct / 100.0 * len(values))) - 1)]
+
+
+# ---------------------------------------------------------------------------
+# Server and dataset
+# ---------------------------------------------------------------------------
+
+def wait_for_port(host, port, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.5)
+    return False
+
+
+class ServerLog(threading.Thread):
+    """ Relay the server log to stderr, counting the retries the server does
+        on concurrency failures before any error reaches the client. """
+
+    def __init__(self, stream):
+        super(ServerLog, self).__init__(name='server-log', daemon=True)
+        self.stream = stream
+        self.retries = 0
+        self.gave_up = 0
+
+    def run(self):
+        for line in self.stream:
+            if SERVER_RETRY_RE.search(line):
+                self.retries += 1
+            elif SERVER_GAVE_UP_RE.search(line):
+                self.gave_up += 1
+            else:
+                sys.stderr.write(line)
+
+
+def start_server(args):
+    """ Install the module in a fresh database, then run a multi-worker
+        server so that requests really execute concurrently. Only warnings
+        and the retries of odoo.service.model are logged. """
+    base = [args.odoo_bin, '-d', args.db, '--addons-path', args.addons_path, '--db-filter', '^%s$' % args.db]
+    if args.db_args:
+        base += args.db_args.split()
+    print('Installing project_dt in %s ...' % args.db, file=sys.stderr)
+    subprocess.check_call(base + ['-i', 'project_dt', '--stop-after-init', '--without-demo', 'all'])
+    server = subprocess.Popen(base + [
+        '--http-port', str(args.port), '--workers', str(args.workers),
+        '--max-cron-threads', '0', '--limit-time-real', '600', '--log-level', 'warn',
+        '--log-handler', 'odoo.service.model:INFO',
+    ], stderr=subprocess.PIPE, universal_newlines=True)
+    log = ServerLog(server.stderr)
+    log.start()
+    if not wait_for_port('127.0.0.1', args.port, 120):
+        server.terminate()
+        raise RuntimeError('Odoo server did not start on port %s' % args.port)
+    return server, log
+
+
+def ensure_stage(admin, values):
+    """ Stage of a previous run with the same name and kind, or a new one:
+        action_close_task expects a single last stage of each kind. """
+    domain = [(name, '=', values.get(name, False)) for name in ('name', 'is_sub_task', 'is_project')]
+    existing = admin.call('project.task.type.dt', 'search', domain, limit=1)
+    if existing:
+        return existing[0]
+    return admin.call('project.task.type.dt', 'create', values)
+
+
+def generate_dataset(admin, args):
+    """ Create designers, stages, projects, tasks and subtasks. """
+    rnd = random.Random(args.seed)
+    print('Generating dataset ...', file=sys.stderr)
+    group_id = admin.call('ir.model.data', 'xmlid_to_res_id', 'project.group_project_manager')
+    user_ids = []
+    for index in range(args.users):
+        login = 'dt_load_%d' % index
+        existing = admin.call('res.users', 'search', [('login', '=', login)])
+        if existing:
+            user_ids.append(existing[0])
+            continue
+        user_ids.append(admin.call('res.users', 'create', {
+            'name': 'Designer %d' % index, 'login': login, 'password': login,
+            'groups_id': [(4, group_id)],
+        }))
+
+    # global stages, not linked to the projects: action_close_task and
+    # action_open_task look for stages without projects
+    task_stages = [ensure_stage(admin, {'name': 'Task stage %d' % i, 'sequence': i, 'is_last_stage': i == 3})
+                   for i in range(4)]
+    sub_stages = [ensure_stage(admin, {'name': 'Sub-task stage %d' % i, 'sequence': i,
+                                       'is_sub_task': True, 'is_last_stage': i == 2}) for i in range(3)]
+    project_stage = ensure_stage(admin, {'name': 'Design', 'is_project': True})
+
+    project_ids = []
+    for index in range(args.projects):
+        members = rnd.sample(user_ids, min(len(user_ids), 8))
+        project_ids.append(admin.call('project.dt', 'create', {
+            'name': 'Load project %d' % index,
+            'stage_id': project_stage,
+            'members': [(6, 0, members)],
+            'favorite_user_ids': [(6, 0, members)],
+        }))
+        for task_index in range(args.tasks):
+            task_id = admin.call('task.dt', 'create', {
+                'name': 'Task %d.%d' % (index, task_index),
+                'project_id': project_ids[-1],
+                'project_stage_id': project_stage,
+                'stage_id': rnd.choice(task_stages[:-1]),
+                'user_id': rnd.choice(members),
+                'planned_hours': rnd.choice([2.0, 4.0, 8.0, 16.0]),
+            })
+            for sub_index in range(args.subtasks):
+                admin.call('task.dt', 'create', {
+                    'name': 'Sub %d.%d.%d' % (index, task_index, sub_index),
+                    'project_id': project_ids[-1],
+                    'parent_id': task_id,
+                    'stage_id_sub': rnd.choice(sub_stages[:-1]),
+                    'planned_hours': rnd.choice([1.0, 2.0, 4.0]),
+                })
+    return {
+        'users': ['dt_load_%d' % index for index in range(args.users)],
+        'projects': project_ids,
+        'task_stages': task_stages,
+        'sub_stages': sub_stages,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Simulated users
+# ---------------------------------------------------------------------------
+
+class Stats(object):
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.serialization_failures = defaultdict(int)
+        self.retries = defaultdict(int)
+
+    def record(self, operation, latency=None, error=False, serialization=0, retries=0):
+        with self.lock:
+            if latency is not None:
+                self.latencies[operation].append(latency)
+            if error:
+                self.errors[operation] += 1
+            self.serialization_failures[operation] += serialization
+            self.retries[operation] += retries
+
+
+class Designer(threading.Thread):
+
+    def __init__(self, args, dataset, login, stats, stop_at, seed):
+        super(Designer, self).__init__(name=login, daemon=True)
+        self.args = args
+        self.dataset = dataset
+        self.login = login
+        self.stats = stats
+        self.stop_at = stop_at
+        self.rnd = random.Random(seed)
+        self.client = None
+
+    def run(self):
+        self.client = RpcClient(self.args.url, self.args.db, self.login, self.login, self.args.protocol)
+        operations, weights = zip(*OPERATIONS.items())
+        while time.time() < self.stop_at:
+            operation = self.rnd.choices(operations, weights)[0]
+            self.execute(operation)
+            if self.args.think_time:
+                time.sleep(self.rnd.uniform(0, self.args.think_time))
+
+    def execute(self, operation):
+        serialization = 0
+        for attempt in range(self.args.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                getattr(self, operation)()
+            except Exception as error:
+                if is_serialization_failure(error):
+                    serialization += 1
+                    if attempt < self.args.max_retries:
+                        time.sleep(self.rnd.uniform(0, 0.1 * 2 ** attempt))
+                        continue
+                self.stats.record(operation, error=True, serialization=serialization, retries=attempt)
+                return
+            self.stats.record(operation, time.perf_counter() - start, serialization=serialization, retries=attempt)
+            return
+
+    # operations -------------------------------------------------------------
+
+    def _random_task(self, subtask=False):
+        project_id = self.rnd.choice(self.dataset['projects'])
+        ids = self.client.call('task.dt', 'search', [
+            ('project_id', '=', project_id), ('parent_id', '!=' if subtask else '=', False)], limit=50)
+        return self.rnd.choice(ids) if ids else None
+
+    def open_dashboard(self):
+        self.client.call('project.dt', 'search_read', [('is_template_project', '=', False)],
+                         fields=['name', 'partner_id', 'color', 'task_count', 'stage_id', 'is_favorite',
+                                 'planned', 'effective', 'progress', 'cs_progress', 'members'],
+                         limit=80)
+
+    def open_project(self):
+        project_id = self.rnd.choice(self.dataset['projects'])
+        self.client.call('task.dt', 'read_group',
+                         [('project_id', '=', project_id), ('parent_id', '=', False)],
+                         ['stage_id'], ['stage_id'])
+        self.client.call('task.dt', 'search_read',
+                         [('project_id', '=', project_id), ('parent_id', '=', False)],
+                         fields=['name', 'stage_id', 'user_id', 'date_deadline', 'progress', 'kanban_state'],
+                         limit=80)
+
+    def move_stage(self):
+        task_id = self._random_task()
+        if task_id:
+            self.client.call('task.dt', 'write', [task_id], {'stage_id': self.rnd.choice(self.dataset['task_stages'][:-1])})
+
+    def close_task(self):
+        task_id = self._random_task()
+        if task_id:
+            self.client.call('task.dt', 'action_close_task', [task_id])
+
+    def reopen_task(self):
+        task_id = self._random_task()
+        if task_id:
+            self.client.call('task.dt', 'action_open_task', [task_id])
+
+    def create_subtask(self):
+        task_id = self._random_task()
+        if task_id:
+            task = self.client.call('task.dt', 'read', [task_id], ['project_id'])[0]
+            self.client.call('task.dt', 'create', {
+                'name': 'Load sub-task',
+                'parent_id': task_id,
+                'project_id': task['project_id'] and task['project_id'][0],
+                'stage_id_sub': self.rnd.choice(self.dataset['sub_stages'][:-1]),
+                'planned_hours': 1.0,
+            })
+
+
+def report(stats, elapsed, as_json=False, server_log=None):
+    rows = []
+    for operation in sorted(set(stats.latencies) | set(stats.errors)):
+        latencies = stats.latencies.get(operation, [])
+        rows.append({
+            'operation': operation,
+            'count': len(latencies),
+            'throughput': len(latencies) / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'errors': stats.errors.get(operation, 0),
+            'serialization_failures': stats.serialization_failures.get(operation, 0),
+            'retries': stats.retries.get(operation, 0),
+        })
+    server = None
+    if server_log:
+        server = {'retries': server_log.retries, 'gave_up': server_log.gave_up}
+    if as_json:
+        print(json.dumps({'elapsed': elapsed, 'operations': rows, 'server': server}, indent=2))
+        return
+    header = '%-16s %7s %8s %9s %9s %9s %7s %7s %7s' % (
+        'operation', 'count', 'ops/s', 'p50 ms', 'p95 ms', 'p99 ms', 'errors', 'serial', 'retries')
+    print(header)
+    print('-' * len(header))
+    for row in rows:
+        print('%-16s %7d %8.2f %9.1f %9.1f %9.1f %7d %7d %7d' % (
+            row['operation'], row['count'], row['throughput'], row['p50_ms'], row['p95_ms'],
+            row['p99_ms'], row['errors'], row['serialization_failures'], row['retries']))
+    total = sum(row['count'] for row in rows)
+    print('-' * len(header))
+    print('%d operations in %.1fs (%.2f ops/s)' % (total, elapsed, total / elapsed if elapsed else 0.0))
+    if server:
+        print('server-side retries: %(retries)d, gave up: %(gave_up)d (not attributed to operations)' % server)
+    else:
+        print('server-side retries: not captured with --url, see the odoo.service.model INFO lines of its log')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help="Use a running server instead of starting one (e.g. http://localhost:8069)")
+    parser.add_argument('--odoo-bin', default='odoo-bin')
+    parser.add_argument('--addons-path', default='')
+    parser.add_argument('--db-args', default='', help="Extra database options for odoo-bin, e.g. '--db_host localhost'")
+    parser.add_argument('--db', default='project_dt_loadtest')
+    parser.add_argument('--port', type=int, default=8269)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--admin-login', default='admin')
+    parser.add_argument('--admin-password', default='admin')
+    parser.add_argument('--protocol', choices=['xmlrpc', 'jsonrpc'], default='xmlrpc')
+    parser.add_argument('--projects', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=30, help="Tasks per project")
+    parser.add_argument('--subtasks', type=int, default=3, help="Subtasks per task")
+    parser.add_argument('--users', type=int, default=20, help="Concurrent simulated designers")
+    parser.add_argument('--duration', type=float, default=60.0, help="Seconds of load")
+    parser.add_argument('--think-time', type=float, default=0.0, help="Max random pause between operations")
+    parser.add_argument('--max-retries', type=int, default=3, help="Client retries on serialization failures")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+
+    server = server_log = None
+    if not args.url:
+        server, server_log = start_server(args)
+        args.url = 'http://127.0.0.1:%d' % args.port
+    try:
+        admin = RpcClient(args.url, args.db, args.admin_login, args.admin_password, args.protocol)
+        dataset = generate_dataset(admin, args)
+        stats = Stats()
+        start = time.time()
+        designers = [Designer(args, dataset, login, stats, start + args.duration, args.seed + index)
+                     for index, login in enumerate(dataset['users'])]
+        print('Running %d designers for %ss ...' % (len(designers), args.duration), file=sys.stderr)
+        for designer in designers:
+            designer.start()
+        for designer in designers:
+            designer.join()
+        report(stats, time.time() - start, args.json, server_log)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()